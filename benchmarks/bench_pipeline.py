@@ -0,0 +1,271 @@
+"""
+Throughput benchmark of the ingestion and reporting hot paths on synthetic recordings.
+
+    python benchmarks/bench_pipeline.py --scales 1000,10000,100000
+    python benchmarks/bench_pipeline.py --scales 1000 --compare benchmarks/results/<previous>.json
+"""
+
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+import numpy as np
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from risk_analysis_utils.risk_evaluation_pipeline import (
+    SUMMARY_BATCH_SIZE,
+    RiskEvaluationPipeline,
+    _add_summaries,
+)
+from risk_analysis_utils.tools.evaluation_results import EvaluationResults
+from risk_analysis_utils.tools.recording_parser import available_backends, parse_recording
+from risk_analysis_utils.tools.synthetic import generate_recordings
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class BenchmarkContext:
+    def __init__(self, data_dir: str, output_dir: str, max_distance: float, resolution: float):
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.max_distance = max_distance
+        self.resolution = resolution
+        self.num_bins = int(max_distance / resolution)
+        self.file_paths = [
+            os.path.join(data_dir, f) for f in sorted(os.listdir(data_dir)) if f.endswith(".json")
+        ]
+        self.summaries = None
+        self.results = None
+
+    def new_results(self) -> EvaluationResults:
+        return EvaluationResults(
+            num_bins=self.num_bins,
+            num_files=len(self.file_paths),
+            max_distance=self.max_distance,
+            resolution=self.resolution,
+        )
+
+    def output(self, filename: str) -> str:
+        return os.path.join(self.output_dir, filename)
+
+    def fresh_results(self) -> EvaluationResults:
+        # Writers share the cached views, drop them so each writer pays for its own view
+        self.results._views_key = None
+        return self.results
+
+
+def _ingestion(ctx: BenchmarkContext):
+    pipeline = RiskEvaluationPipeline(
+        ctx.data_dir, max_distance=ctx.max_distance, resolution=ctx.resolution, use_cache=False
+    )
+    pipeline._run_evaluation()
+
+
+def _parsing(backend: str):
+    def stage(ctx: BenchmarkContext):
+        ctx.summaries = [parse_recording(path, backend=backend) for path in ctx.file_paths]
+
+    return stage
+
+
+def _binning(ctx: BenchmarkContext):
+    results = ctx.new_results()
+    for start in range(0, len(ctx.summaries), SUMMARY_BATCH_SIZE):
+        batch = ctx.summaries[start : start + SUMMARY_BATCH_SIZE]
+        _add_summaries(results, batch, ctx.resolution, ctx.num_bins)
+    ctx.results = results
+
+
+def _write_file_names(ctx: BenchmarkContext):
+    pipeline = RiskEvaluationPipeline(
+        ctx.data_dir, max_distance=ctx.max_distance, resolution=ctx.resolution, use_cache=False
+    )
+    pipeline.results = ctx.fresh_results()
+    pipeline.results_dir = ctx.output_dir
+    pipeline._write_evaluation()
+
+
+def _console(ctx: BenchmarkContext):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx.fresh_results().log_to_console()
+
+
+STAGES = {
+    "ingestion": _ingestion,
+    **{f"parsing ({backend})": _parsing(backend) for backend in available_backends()},
+    "binning": _binning,
+    "log_to_file": lambda ctx: ctx.fresh_results().log_to_file(ctx.output("results.txt")),
+    "save_obstacle_frequency_json": lambda ctx: ctx.fresh_results().save_obstacle_frequency_json(
+        ctx.output("frequency.json")
+    ),
+    "save_obstacle_frequency_csv": lambda ctx: ctx.fresh_results().save_obstacle_frequency_csv(
+        ctx.output("frequency.csv")
+    ),
+    "save_durations_csv": lambda ctx: ctx.fresh_results().save_durations_csv(
+        ctx.output("durations.csv")
+    ),
+    "rate_intervals": lambda ctx: ctx.fresh_results().rate_intervals(),
+    "save_obstacle_rates_csv": lambda ctx: ctx.fresh_results().save_obstacle_rates_csv(
+        ctx.output("rates.csv")
+    ),
+    "write_file_names": _write_file_names,
+    "save_npz": lambda ctx: ctx.fresh_results().save(ctx.output("results.npz")),
+    "console": _console,
+}
+
+
+def _measure(stage, ctx: BenchmarkContext, trace_memory: bool) -> dict:
+    start = time.perf_counter()
+    stage(ctx)
+    wall = time.perf_counter() - start
+    measurement = {"wall_s": wall}
+    if trace_memory:
+        # Separate traced pass, tracemalloc slows down the stage too much to time it
+        tracemalloc.start()
+        stage(ctx)
+        measurement["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return measurement
+
+
+def _max_rss_mb() -> float:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+def run_scale(num_files: int, workdir: str, trace_memory: bool, **generator_options) -> dict:
+    data_dir = os.path.join(workdir, f"data_{num_files}")
+    output_dir = os.path.join(workdir, f"output_{num_files}")
+    os.makedirs(output_dir, exist_ok=True)
+    # Not a .json file, so that the pipeline does not pick it up as a recording
+    marker = os.path.join(data_dir, ".generated")
+    generated = json.load(open(marker)) if os.path.exists(marker) else {}
+    if generated.get("options") == generator_options:
+        num_obstacles = generated["num_obstacles"]
+    else:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        num_obstacles = generate_recordings(data_dir, num_files, **generator_options)
+        with open(marker, "w") as f:
+            json.dump({"options": generator_options, "num_obstacles": num_obstacles}, f)
+
+    ctx = BenchmarkContext(data_dir, output_dir, generator_options["max_distance"], resolution=0.5)
+    stages = {}
+    for name, stage in STAGES.items():
+        measurement = _measure(stage, ctx, trace_memory)
+        measurement["files_per_s"] = num_files / measurement["wall_s"]
+        measurement["obstacles_per_s"] = num_obstacles / measurement["wall_s"]
+        stages[name] = measurement
+    return {
+        "num_files": num_files,
+        "num_obstacles": num_obstacles,
+        "max_rss_mb": _max_rss_mb(),
+        "stages": stages,
+    }
+
+
+def _print_scale(console: Console, scale: dict, baseline: Optional[dict]):
+    table = Table(
+        title=f"[bold blue]{scale['num_files']} files, {scale['num_obstacles']} obstacles[/bold blue]",
+        expand=True,
+    )
+    table.add_column("Stage", style="cyan")
+    table.add_column("Wall (s)", justify="right")
+    table.add_column("Files/s", justify="right")
+    table.add_column("Obstacles/s", justify="right")
+    table.add_column("Peak (MiB)", justify="right")
+    if baseline is not None:
+        table.add_column("Speedup", justify="right", style="green")
+    for name, stage in scale["stages"].items():
+        row = [
+            name,
+            f"{stage['wall_s']:.3f}",
+            f"{stage['files_per_s']:,.0f}",
+            f"{stage['obstacles_per_s']:,.0f}",
+            f"{stage['peak_mb']:.1f}" if "peak_mb" in stage else "-",
+        ]
+        if baseline is not None:
+            previous = baseline.get("stages", {}).get(name)
+            row.append(f"{previous['wall_s'] / stage['wall_s']:.2f}x" if previous else "-")
+        table.add_row(*row)
+    console.print(table)
+    parse_json = scale["stages"]["parsing (json)"]
+    for name, stage in scale["stages"].items():
+        if name.startswith("parsing (") and name != "parsing (json)":
+            console.print(
+                f"{name} throughput gain over the stdlib: "
+                f"{stage['files_per_s'] / parse_json['files_per_s']:.2f}x"
+            )
+    console.print(f"Process peak RSS: {scale['max_rss_mb']:.1f} MiB\n")
+
+
+def main(
+    scales: str = typer.Option("1000,10000,100000", help="Comma separated file counts"),
+    obstacles_per_file: int = typer.Option(5, help="Mean number of obstacles per file"),
+    distance_distribution: str = typer.Option("uniform", help="uniform or exponential"),
+    higher_fraction: float = typer.Option(0.6, help="Share of higher obstacles"),
+    dropoff_fraction: float = typer.Option(0.35, help="Share of dropoffs, the rest are both"),
+    obstacle_free_fraction: float = typer.Option(0.2, help="Share of obstacle-free files"),
+    max_distance: float = typer.Option(4.0, help="Maximum distance for evaluation"),
+    workdir: Optional[Path] = typer.Option(
+        None, help="Directory for the generated data, reused across runs if given"
+    ),
+    memory: bool = typer.Option(True, help="Measure the peak memory of each stage"),
+    compare: Optional[Path] = typer.Option(None, help="Previous results file to compare with"),
+    output: Optional[Path] = typer.Option(None, help="Where to save the results"),
+):
+    generator_options = dict(
+        obstacles_per_file=obstacles_per_file,
+        max_distance=max_distance,
+        distance_distribution=distance_distribution,
+        higher_fraction=higher_fraction,
+        dropoff_fraction=dropoff_fraction,
+        obstacle_free_fraction=obstacle_free_fraction,
+    )
+    baseline = json.load(open(compare)) if compare is not None else None
+    baseline_scales = {s["num_files"]: s for s in baseline["scales"]} if baseline else {}
+
+    console = Console()
+    run_workdir = str(workdir) if workdir is not None else tempfile.mkdtemp(prefix="risk_bench_")
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "generator": generator_options,
+        "scales": [],
+    }
+    try:
+        for num_files in [int(n) for n in scales.split(",") if n]:
+            scale = run_scale(num_files, run_workdir, memory, **generator_options)
+            report["scales"].append(scale)
+            _print_scale(console, scale, baseline_scales.get(num_files) if baseline else None)
+    finally:
+        if workdir is None:
+            shutil.rmtree(run_workdir, ignore_errors=True)
+
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"bench_{datetime.datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    console.print(f"Saved benchmark results to {output}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
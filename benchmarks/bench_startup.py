@@ -0,0 +1,152 @@
+"""
+Cold start benchmark of the risk_analysis_pipeline CLI.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --target-ms 200
+
+Every scenario runs the CLI in a fresh interpreter and reports the median wall time together
+with the time spent importing the heavy modules. The exit status is 1 when the median of a
+quiet evaluation exceeds the target or when it imports rich or tqdm. --help and the console
+scenario are references: both render with rich, typer formats the help of the rich_help_panel
+options with it.
+"""
+
+import datetime
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from risk_analysis_utils.tools.synthetic import generate_recordings
+
+RESULTS_DIR = Path(__file__).parent / "results"
+CLI = "from risk_analysis_utils.tools.cmd import run; run()"
+HEAVY_MODULES = ("numpy", "rich", "tqdm")
+# Only needed to render output, quiet evaluations must not import them
+DISPLAY_MODULES = ("rich", "tqdm")
+
+
+def _scenarios(workdir: str) -> dict:
+    empty_dir = os.path.join(workdir, "empty")
+    small_dir = os.path.join(workdir, "small")
+    os.makedirs(empty_dir, exist_ok=True)
+    generate_recordings(small_dir, 20)
+    # name -> (arguments, whether the target applies)
+    return {
+        "help": (["--help"], False),
+        "evaluate empty (quiet)": ([empty_dir, "--quiet", "--no-cache"], True),
+        "evaluate 20 files (quiet)": ([small_dir, "--quiet", "--no-cache"], True),
+        "evaluate 20 files (summary)": ([small_dir, "--console", "summary", "--no-cache"], False),
+    }
+
+
+def _run(args: list, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", CLI, *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def _imports(args: list, env: dict) -> dict:
+    """
+    Time in ms spent importing the modules of each heavy package during a run.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CLI, *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    imported = {}
+    for match in re.finditer(r"import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)", completed.stderr):
+        self_us, module = match.groups()
+        package = module.split(".")[0]
+        if package in HEAVY_MODULES:
+            imported[package] = imported.get(package, 0.0) + int(self_us) / 1000
+    return imported
+
+
+def main(
+    repeat: int = typer.Option(10, help="Runs per scenario"),
+    target_ms: float = typer.Option(
+        250.0, help="Maximum median wall time of the quiet evaluations"
+    ),
+    output: Optional[Path] = typer.Option(None, help="Where to save the results"),
+):
+    console = Console()
+    workdir = tempfile.mkdtemp(prefix="risk_startup_")
+    # Fixed console width, so that the rendered tables do not depend on the terminal
+    env = dict(os.environ, COLUMNS="120")
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target_ms": target_ms,
+        "scenarios": {},
+    }
+    try:
+        for name, (args, checked) in _scenarios(workdir).items():
+            _run(args, env)  # Warm up the file system cache, the interpreter still starts cold
+            times = [_run(args, env) * 1000 for _ in range(repeat)]
+            report["scenarios"][name] = {
+                "median_ms": statistics.median(times),
+                "min_ms": min(times),
+                "imports_ms": _imports(args, env),
+                "checked": checked,
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    table = Table(title=f"[bold blue]CLI cold start, target {target_ms:.0f} ms[/bold blue]")
+    table.add_column("Scenario", style="cyan")
+    table.add_column("Median (ms)", justify="right")
+    table.add_column("Min (ms)", justify="right")
+    table.add_column("Heavy imports (ms)")
+    failed = []
+    for name, scenario in report["scenarios"].items():
+        displayed = [m for m in DISPLAY_MODULES if m in scenario["imports_ms"]]
+        within = not scenario["checked"] or (scenario["median_ms"] <= target_ms and not displayed)
+        if not within:
+            failed.append(name)
+        table.add_row(
+            name,
+            f"[{'green' if within else 'red'}]{scenario['median_ms']:.0f}[/]",
+            f"{scenario['min_ms']:.0f}",
+            ", ".join(f"{m} {t:.0f}" for m, t in scenario["imports_ms"].items()) or "-",
+        )
+    console.print(table)
+
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"startup_{datetime.datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    console.print(f"Saved startup results to {output}")
+    if failed:
+        console.print(
+            f"[bold red]Above the {target_ms:.0f} ms target or importing "
+            f"{' or '.join(DISPLAY_MODULES)}: {', '.join(failed)}[/bold red]"
+        )
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,125 +1,505 @@
 import os
-import tqdm
-import json
+import numpy as np
 import datetime
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from risk_analysis_utils.tools.evaluation_cache import EvaluationCache
 from risk_analysis_utils.tools.evaluation_results import EvaluationResults
+from risk_analysis_utils.tools.interval_index import merge_overlapping
+from risk_analysis_utils.tools.progress import progress
+from risk_analysis_utils.tools.recording_parser import (
+    DEFAULT_STREAM_THRESHOLD,
+    parse_recording_stream,
+)
+from risk_analysis_utils.tools.recording_sources import (
+    ArchiveReader,
+    is_archive,
+    list_directory,
+    output_base,
+    prefetch,
+)
+from risk_analysis_utils.tools.run_metrics import RunMetrics
+from risk_analysis_utils.tools.obstacle_table import (
+    HIGHER_OBSTACLE,
+    digitize_distances,
+)
+
+# Summaries buffered before they are binned together, bounding the memory of the buffer
+SUMMARY_BATCH_SIZE = 1024
+
+
+def _add_summaries(
+    results: EvaluationResults,
+    summaries: list,
+    resolution: float,
+    num_bins: int,
+    min_frames: int = 3,
+    merge_overlaps: bool = False,
+):
+    """
+    Bin the obstacles of a batch of recording summaries into results, with a single digitize
+    and append for the whole batch. With merge_overlaps, overlapping detections of the same
+    obstacle type in a recording are merged first; obstacles lasting less than min_frames frames
+    are then dropped as spurious detections.
+    """
+    if not summaries:
+        return
+    recordings = results.recordings
+    recordings.extend(
+        [recordings.intern(summary["name"]) for summary in summaries],
+        [np.nan if summary["duration"] is None else summary["duration"] for summary in summaries],
+        [summary["num_obstacles"] for summary in summaries],
+    )
+    summaries = [summary for summary in summaries if summary["num_obstacles"]]
+    if not summaries:
+        return
+
+    obstacles = results.obstacles
+    file_ids = np.array([obstacles.intern(summary["name"]) for summary in summaries], np.int32)
+    lengths = [len(summary["start_frame"]) for summary in summaries]
+    file_ids = np.repeat(file_ids, lengths)
+    start_frames, end_frames, distances, obstacle_types = (
+        np.concatenate([np.asarray(summary[column], dtype=dtype) for summary in summaries])
+        for column, dtype in (
+            ("start_frame", np.int64),
+            ("end_frame", np.int64),
+            ("distance", np.float64),
+            ("obstacle_type", np.int8),
+        )
+    )
+    if merge_overlaps:
+        start_frames, end_frames, distances, obstacle_types, file_ids = merge_overlapping(
+            start_frames, end_frames, distances, obstacle_types, groups=file_ids
+        )
+    keep = (end_frames - start_frames) >= min_frames
+    obstacles.extend(
+        file_ids[keep].astype(np.int32),
+        start_frames[keep],
+        end_frames[keep],
+        distances[keep],
+        digitize_distances(distances[keep], resolution, num_bins),
+        obstacle_types[keep],
+    )
+
+
+def _timed_parse(entry, json_backend: str = "auto"):
+    """
+    Parse a recording and return its summary with (key, bytes, seconds) for the run metrics.
+    """
+    start = time.perf_counter()
+    entry.stat()
+    with entry.open() as f:
+        summary = parse_recording_stream(f, backend=json_backend, size=entry.size)
+    return summary, (entry.key, entry.size, time.perf_counter() - start)
+
+
+def _parse_files(entries, json_backend: str = "auto", read_ahead: int = 0, read_workers: int = 0):
+    """
+    Parse a chunk of recordings in a worker process. Returns their summaries by key and the
+    parse statistics of each file.
+    """
+    parsed = {}
+    file_stats = []
+    items = prefetch(
+        [(entry, None) for entry in entries], read_ahead, read_workers, DEFAULT_STREAM_THRESHOLD
+    )
+    for entry, _ in items:
+        parsed[entry.key], stats = _timed_parse(entry, json_backend)
+        entry.release()
+        file_stats.append(stats)
+    return parsed, file_stats
 
 
 class RiskEvaluationPipeline:
-    def __init__(self, evaluation_dir, max_distance=4.0, resolution=0.5):
-        self.evaluation_dir = evaluation_dir
-        self._n_videos = len([f for f in os.listdir(evaluation_dir) if f.endswith(".json")])
+    # Output name -> writer, selectable with the outputs argument
+    OUTPUTS = {
+        "file_names": "_write_evaluation",
+        "results": "_write_results_to_file",
+        "durations": "_write_durations_to_csv",
+        "rates": "_write_obstacle_rates_to_csv",
+        "npz": "_write_binary_results",
+    }
+
+    def __init__(
+        self,
+        evaluation_dir,
+        max_distance=4.0,
+        resolution=0.5,
+        workers=1,
+        use_cache=True,
+        cache_hash=False,
+        json_backend="auto",
+        read_ahead=0,
+        read_workers=4,
+        outputs=None,
+        min_frames=3,
+        merge_overlaps=False,
+        bootstrap_resamples=1000,
+        confidence=0.95,
+        seed=0,
+    ):
+        # One or several directories and .tar(.gz)/.zip archives of recordings, evaluated in order
+        sources = evaluation_dir if isinstance(evaluation_dir, (list, tuple)) else [evaluation_dir]
+        if not sources:
+            raise ValueError("At least one directory or archive of recordings is required")
+        self.sources = [str(source) for source in sources]
+        # Results and the cache live next to the first source
+        self.evaluation_dir = output_base(self.sources[0])
 
         self._resolution = resolution
+        self._max_distance = max_distance
         self._num_bins = int(max_distance / resolution)
+        self._workers = workers
+        self._json_backend = json_backend
+        # Files read ahead of the parser by a thread pool, so that I/O latency overlaps parsing.
+        # Off by default: on local disks the per-file hand-off costs more than it saves
+        self._read_ahead = read_ahead
+        self._read_workers = read_workers
+        # Applied when binning, so cached summaries stay valid when they change
+        self._min_frames = min_frames
+        self._merge_overlaps = merge_overlaps
+        self._cache = (
+            EvaluationCache(self.evaluation_dir, use_hash=cache_hash) if use_cache else None
+        )
         self.results = EvaluationResults(
-            num_bins=self._num_bins, num_files=self._n_videos, max_distance=max_distance
+            num_bins=self._num_bins,
+            num_files=0,
+            max_distance=max_distance,
+            resolution=resolution,
         )
+        self.results.bootstrap = {
+            "num_resamples": bootstrap_resamples,
+            "confidence": confidence,
+            "seed": seed,
+        }
+
+        self.outputs = list(self.OUTPUTS) if outputs is None else list(outputs)
+        unknown = [output for output in self.outputs if output not in self.OUTPUTS]
+        if unknown:
+            raise ValueError(f"Unknown outputs {unknown}, expected some of {list(self.OUTPUTS)}")
 
         self.results_dir = None
+        self.metrics = RunMetrics()
 
     def run(self):
-        self._run_evaluation()
-        self._create_output_folder()
-        self._write_evaluation()
-        self._write_results_to_file()
-        self._write_durations_to_csv()
+        with self.metrics.stage("run"):
+            with self.metrics.stage("run_evaluation"):
+                self._run_evaluation()
+            self._create_output_folder()
+            self._write_outputs()
+            self._update_latest()
+        self._write_metrics()
         return self.results
 
+    def print(self, mode: str = "full", top: int = 20, page_size: int = None):
+        with self.metrics.stage("print"):
+            self.results.print(mode=mode, top=top, page_size=page_size)
+        self._write_metrics()
+
+    def _write_outputs(self, results: EvaluationResults = None, output_dir=None, prefix=""):
+        """
+        Write the selected outputs concurrently to a staging folder and rename them into the
+        output folder once all of them succeeded, so that readers never see partial files.
+        """
+        results = results or self.results
+        output_dir = str(output_dir or self.results_dir)
+        with self.metrics.stage(f"{prefix}prepare_views"):
+            # Shared by several writers, computed once before they run in parallel
+            results.prepare_views()
+        if "rates" in self.outputs:
+            with self.metrics.stage(f"{prefix}statistics"):
+                # Bootstrap of the rate confidence intervals, reused by the console output
+                results.rate_intervals()
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=output_dir)
+        try:
+            with ThreadPoolExecutor(max_workers=len(self.outputs) or 1) as executor:
+                futures = [
+                    executor.submit(self._write_output, output, results, staging_dir, prefix)
+                    for output in self.outputs
+                ]
+                for future in futures:
+                    future.result()
+            for filename in os.listdir(staging_dir):
+                os.replace(os.path.join(staging_dir, filename), os.path.join(output_dir, filename))
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _write_output(self, output: str, results: EvaluationResults, output_dir: str, prefix=""):
+        writer = self.OUTPUTS[output]
+        with self.metrics.stage(f"{prefix}{writer.lstrip('_')}", threaded=True):
+            getattr(self, writer)(results, output_dir)
+
+    def _write_metrics(self):
+        if self.results_dir is None:
+            raise ValueError(
+                "results_dir is not set. Please ensure the output folder is created before writing evaluation."
+            )
+        filename = "metrics.json"
+        filepath = os.path.join(str(self.results_dir), filename)
+        self.metrics.save(filepath)
+
     def _run_evaluation(self):
-        json_files = [file for file in os.listdir(self.evaluation_dir) if file.endswith(".json")]
-        for file in tqdm.tqdm(json_files, desc="Processing JSON files"):
-            file_path = os.path.join(self.evaluation_dir, file)
-            with open(file_path, "r") as f:
-                data = json.load(f)
-
-                if not data["obstacles"]:
-                    self.results._count_obstacle_free += 1
-                    self.results.obstacle_free_file_names.append(data["name"])
+        with self.metrics.stage("listing"):
+            directories = {
+                source: list_directory(source, stat=self._cache is not None)
+                for source in self.sources
+                if not is_archive(source)
+            }
+        if self._cache is not None:
+            with self.metrics.stage("cache_lookup"):
+                self._cache.load()
+                directories = {
+                    source: [(entry, self._cache.lookup(entry)) for entry in entries]
+                    for source, entries in directories.items()
+                }
+        else:
+            directories = {
+                source: [(entry, None) for entry in entries]
+                for source, entries in directories.items()
+            }
+
+        keys = []
+        pending = []
+        with self.metrics.stage("parse_and_bin"):
+            for source in self.sources:
+                if source not in directories:
+                    keys.extend(self._run_evaluation_archive(source))
                     continue
+                entries = directories[source]
+                keys.extend(entry.key for entry, _ in entries)
+                if self._workers <= 1:
+                    parsed = self._run_evaluation_serial(entries)
+                else:
+                    parsed = self._run_evaluation_parallel(entries)
+                pending.extend(
+                    (entry, parsed[entry.key]) for entry, _ in entries if entry.key in parsed
+                )
+
+        self.results._num_files = len(keys)
+        self.metrics.counters["files"] += len(keys)
+        self.metrics.counters["files_cached"] = (
+            self.metrics.counters["files"] - self.metrics.counters["files_parsed"]
+        )
+        self.metrics.counters["obstacles"] = len(self.results.obstacles)
+        if self._cache is not None:
+            with self.metrics.stage("cache_save"):
+                self._cache.prune(keys, self.sources)
+                for entry, summary in pending:
+                    self._cache.update(entry, summary)
+                self._cache.save()
+
+    def _run_evaluation_serial(self, entries):
+        parsed = {}
+        batch = []
+        total = len(entries)
+        entries = prefetch(entries, self._read_ahead, self._read_workers, DEFAULT_STREAM_THRESHOLD)
+        for entry, summary in progress(entries, total=total, desc="Processing JSON files"):
+            if summary is None:
+                summary, stats = _timed_parse(entry, self._json_backend)
+                entry.release()
+                parsed[entry.key] = summary
+                self.metrics.record_file(*stats)
+            batch.append(summary)
+            if len(batch) >= SUMMARY_BATCH_SIZE:
+                self._add_summaries(self.results, batch)
+                batch = []
+        self._add_summaries(self.results, batch)
+        return parsed
+
+    def _run_evaluation_parallel(self, entries):
+        # Only the recordings without a cached summary are sent to the workers. All summaries are
+        # binned here afterwards in the order of the entries, which keeps the order of a serial run
+        to_parse = [entry for entry, summary in entries if summary is None]
+        parsed = {}
+        if to_parse:
+            n_chunks = min(len(to_parse), self._workers * 4)
+            chunk_size = -(-len(to_parse) // n_chunks)
+            chunks = [to_parse[i : i + chunk_size] for i in range(0, len(to_parse), chunk_size)]
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                futures = {
+                    executor.submit(
+                        _parse_files,
+                        chunk,
+                        self._json_backend,
+                        self._read_ahead,
+                        self._read_workers,
+                    ): chunk
+                    for chunk in chunks
+                }
+                with progress(total=len(to_parse), desc="Processing JSON files") as progress_bar:
+                    for future in as_completed(futures):
+                        chunk_parsed, file_stats = future.result()
+                        parsed.update(chunk_parsed)
+                        for stats in file_stats:
+                            self.metrics.record_file(*stats)
+                        progress_bar.update(len(futures[future]))
 
-                for obstacle in data["obstacles"]:
-                    duration = data.get("scene_duration")
-                    distance = obstacle["distance"]
-                    bin_index = int(distance // self._resolution)
-                    self.results.durations_of_each_recording.append(
-                        {"name": data["name"], "duration": duration}
-                    )
-                    # [TODO: Dhagash] Should we keep this check?
-                    if (obstacle["end_frame"] - obstacle["start_frame"]) < 3:
-                        continue
-                    if bin_index >= self._num_bins:
-                        bin_index = self._num_bins - 1
-                    if obstacle["is_higher_obstacle"] and not obstacle["is_dropoff"]:
-                        self.results.higher_obstacle_bins[bin_index] += 1
-                        self.results.higher_obstacles_bin_files[bin_index].append(
-                            {"name": data["name"], "startFrame": obstacle["start_frame"]}
-                        )
-
-                    elif obstacle["is_dropoff"] and not obstacle["is_higher_obstacle"]:
-                        self.results.dropoff_bins[bin_index] += 1
-                        self.results.dropoff_bins_files[bin_index].append(
-                            {"name": data["name"], "startFrame": obstacle["start_frame"]}
-                        )
-                    elif obstacle["is_dropoff"] and obstacle["is_higher_obstacle"]:
-                        self.results._count_both_type += 1
-                        self.results.dropoff_higher_obstacle.append(
-                            {"name": data["name"], "startFrame": obstacle["start_frame"]}
-                        )
-                    else:
-                        print(
-                            f"[WARNING] Obstacle Detected but does not belong to any category, problem in code"
-                        )
-
-    def _write_results_to_file(self):
+        batch = []
+        for entry, summary in entries:
+            batch.append(parsed[entry.key] if summary is None else summary)
+            if len(batch) >= SUMMARY_BATCH_SIZE:
+                self._add_summaries(self.results, batch)
+                batch = []
+        self._add_summaries(self.results, batch)
+        return parsed
+
+    def _run_evaluation_archive(self, archive_path):
+        """
+        Evaluate the recordings of an archive without extracting it. Tar archives can only be read
+        sequentially, so members are parsed in this process and cached while they are at hand.
+        """
+        keys = []
+        batch = []
+        reader = ArchiveReader(archive_path)
+        with progress(
+            total=reader.size,
+            unit="B",
+            unit_scale=True,
+            desc=f"Processing {os.path.basename(archive_path)}",
+        ) as progress_bar:
+            for entry in reader:
+                keys.append(entry.key)
+                summary = self._cache.lookup(entry) if self._cache is not None else None
+                if summary is None:
+                    if self._cache is not None and self._cache.use_hash:
+                        # Keep the content, the member stream cannot be read a second time
+                        entry.read()
+                    summary, stats = _timed_parse(entry, self._json_backend)
+                    self.metrics.record_file(*stats)
+                    if self._cache is not None:
+                        self._cache.update(entry, summary)
+                batch.append(summary)
+                if len(batch) >= SUMMARY_BATCH_SIZE:
+                    self._add_summaries(self.results, batch)
+                    batch = []
+                progress_bar.update(reader.position - progress_bar.n)
+            self._add_summaries(self.results, batch)
+            progress_bar.update(reader.size - progress_bar.n)
+        return keys
+
+    def _add_summaries(self, results: EvaluationResults, summaries: list):
+        _add_summaries(
+            results,
+            summaries,
+            self._resolution,
+            self._num_bins,
+            self._min_frames,
+            self._merge_overlaps,
+        )
+
+    def rebin(self, max_distance: float, resolution: float) -> EvaluationResults:
+        """
+        Rebin the evaluated results and write them to a subfolder of the results directory.
+        """
         if self.results_dir is None:
             raise ValueError(
                 "results_dir is not set. Please ensure the output folder is created before writing evaluation."
             )
+        results = self.results.rebin(max_distance, resolution)
+        output_dir = os.path.join(str(self.results_dir), f"bins_{max_distance:g}m_{resolution:g}m")
+        os.makedirs(output_dir, exist_ok=True)
+        self._write_outputs(results, output_dir, prefix=f"{os.path.basename(output_dir)}.")
+        self._write_metrics()
+        return results
+
+    def _write_results_to_file(self, results: EvaluationResults = None, output_dir=None):
+        results = results or self.results
+        output_dir = output_dir or self.results_dir
+        if output_dir is None:
+            raise ValueError(
+                "results_dir is not set. Please ensure the output folder is created before writing evaluation."
+            )
         filename = "evaluation_results.txt"
-        filepath = os.path.join(str(self.results_dir), filename)
-        self.results.log_to_file(filepath)
+        filepath = os.path.join(str(output_dir), filename)
+        results.log_to_file(filepath)
 
-    def _write_evaluation(self):
-        if self.results_dir is None:
+    def _write_evaluation(self, results: EvaluationResults = None, output_dir=None):
+        results = results or self.results
+        output_dir = output_dir or self.results_dir
+        if output_dir is None:
             raise ValueError(
                 "results_dir is not set. Please ensure the output folder is created before writing evaluation."
             )
         filename = "file_names_with_obstatce_ranges.txt"
-        filepath = os.path.join(str(self.results_dir), filename)
+        filepath = os.path.join(str(output_dir), filename)
+        obstacles = results.obstacles
+        higher = obstacles.obstacle_type == HIGHER_OBSTACLE
+        # Stable sort keeps the per-bin file order of the obstacle table
+        order = np.argsort(obstacles.bin_index[higher], kind="stable")
+        sorted_bins = obstacles.bin_index[higher][order]
+        sorted_file_ids = obstacles.file_id[higher][order]
         with open(filepath, "w") as f:
-            for i in range(self._num_bins):
-                range_start = i * self._resolution
-                range_end = (i + 1) * self._resolution
-                filenames = [entry["name"] for entry in self.results.higher_obstacles_bin_files[i]]
+            for i in range(results._num_bins):
+                range_start = i * results._resolution
+                range_end = (i + 1) * results._resolution
+                lo, hi = np.searchsorted(sorted_bins, [i, i + 1])
+                filenames = [obstacles.names[file_id] for file_id in sorted_file_ids[lo:hi]]
                 if filenames:
                     f.write(f"Obstacles in range {range_start:.1f} to {range_end:.1f}m:\n")
                     for name in filenames:
                         f.write(f"    - {name}\n")
                     f.write("\n")
 
-    def _write_durations_to_csv(self):
-        if self.results_dir is None:
+    def _write_durations_to_csv(self, results: EvaluationResults = None, output_dir=None):
+        results = results or self.results
+        output_dir = output_dir or self.results_dir
+        if output_dir is None:
             raise ValueError(
                 "results_dir is not set. Please ensure the output folder is created before writing evaluation."
             )
         filename = "durations_of_each_recording.csv"
-        filepath = os.path.join(str(self.results_dir), filename)
-        self.results.save_durations_csv(filepath)
+        filepath = os.path.join(str(output_dir), filename)
+        results.save_durations_csv(filepath)
+
+    def _write_obstacle_rates_to_csv(self, results: EvaluationResults = None, output_dir=None):
+        results = results or self.results
+        output_dir = output_dir or self.results_dir
+        if output_dir is None:
+            raise ValueError(
+                "results_dir is not set. Please ensure the output folder is created before writing evaluation."
+            )
+        filename = "obstacle_rates_per_hour.csv"
+        filepath = os.path.join(str(output_dir), filename)
+        results.save_obstacle_rates_csv(filepath)
+
+    def _write_binary_results(self, results: EvaluationResults = None, output_dir=None):
+        results = results or self.results
+        output_dir = output_dir or self.results_dir
+        if output_dir is None:
+            raise ValueError(
+                "results_dir is not set. Please ensure the output folder is created before writing evaluation."
+            )
+        filename = "evaluation_results.npz"
+        filepath = os.path.join(str(output_dir), filename)
+        results.save(filepath)
 
     @staticmethod
     def _get_results_dir(evaluation_dir: str):
         results_dir = os.path.join(
             evaluation_dir, "results", datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         )
-        latest_dir = os.path.join(
-            os.path.realpath(os.path.join(evaluation_dir, "results")), "latest"
-        )
         os.makedirs(results_dir, exist_ok=True)
-        os.unlink(latest_dir) if os.path.exists(latest_dir) or os.path.islink(latest_dir) else None
-        os.symlink(results_dir, latest_dir)
 
         return results_dir
 
     def _create_output_folder(self):
         self.results_dir = self._get_results_dir(self.evaluation_dir)
+
+    def _update_latest(self):
+        """
+        Point results/latest to the results folder, once all of its outputs are written.
+        The link is relative to the results root and swapped atomically.
+        """
+        if self.results_dir is None:
+            raise ValueError(
+                "results_dir is not set. Please ensure the output folder is created before writing evaluation."
+            )
+        results_root = os.path.dirname(os.path.abspath(str(self.results_dir)))
+        latest_dir = os.path.join(results_root, "latest")
+        tmp_link = os.path.join(results_root, f".latest-{os.getpid()}")
+        if os.path.islink(tmp_link):
+            os.unlink(tmp_link)
+        os.symlink(os.path.basename(os.path.abspath(str(self.results_dir))), tmp_link)
+        os.replace(tmp_link, latest_dir)
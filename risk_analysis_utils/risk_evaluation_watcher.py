@@ -0,0 +1,173 @@
+import os
+import time
+
+from risk_analysis_utils.risk_evaluation_pipeline import RiskEvaluationPipeline
+from risk_analysis_utils.tools.evaluation_results import EvaluationResults
+from risk_analysis_utils.tools.recording_parser import parse_recording
+from risk_analysis_utils.tools.recording_sources import RecordingEntry
+
+
+class RiskEvaluationWatcher:
+    """
+    Keep the results of an evaluation directory up to date while new recordings land in it.
+    The directory is polled every `interval` seconds; new files are parsed and added to the
+    in-memory results, and the outputs are rewritten once no change was seen for `debounce` seconds,
+    or at the latest `max_delay` seconds after the previous write while files keep arriving.
+    """
+
+    def __init__(
+        self,
+        evaluation_dir,
+        max_distance=4.0,
+        resolution=0.5,
+        interval=5.0,
+        debounce=2.0,
+        max_delay=60.0,
+        use_cache=True,
+        json_backend="auto",
+        min_frames=3,
+        merge_overlaps=False,
+    ):
+        self.pipeline = RiskEvaluationPipeline(
+            evaluation_dir,
+            max_distance=max_distance,
+            resolution=resolution,
+            use_cache=use_cache,
+            json_backend=json_backend,
+            min_frames=min_frames,
+            merge_overlaps=merge_overlaps,
+        )
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # Parsed summaries and (size, mtime) of every ingested file, in ingestion order
+        self._summaries = {}
+        self._identities = {}
+        # (size, mtime) of the files that failed to parse, so each failure is only reported once
+        self._failed = {}
+        if self.pipeline._cache is not None:
+            self.pipeline._cache.load()
+
+    @property
+    def results(self) -> EvaluationResults:
+        return self.pipeline.results
+
+    def _list_files(self) -> dict:
+        identities = {}
+        with os.scandir(self.pipeline.evaluation_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    identities[os.path.abspath(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return identities
+
+    def _summarize(self, file_path, identity):
+        cache = self.pipeline._cache
+        size, mtime_ns = identity
+        entry = RecordingEntry(key=file_path, path=file_path, size=size, mtime_ns=mtime_ns)
+        summary = cache.lookup(entry) if cache is not None else None
+        if summary is None:
+            try:
+                summary = parse_recording(file_path, backend=self.pipeline._json_backend)
+            except (ValueError, KeyError, TypeError) as e:
+                # Most likely still being written, retry on the next poll
+                if self._failed.get(file_path) != identity:
+                    self._failed[file_path] = identity
+                    print(f"[WARNING] Could not parse {file_path}, retrying: {e!r}")
+                return None
+            self._failed.pop(file_path, None)
+            if cache is not None:
+                cache.update(entry, summary)
+        return summary
+
+    def poll(self) -> bool:
+        """
+        Ingest new, modified and deleted files. Returns True if the results changed.
+        """
+        identities = self._list_files()
+        self._failed = {path: failed for path, failed in self._failed.items() if path in identities}
+        deleted = [file_path for file_path in self._identities if file_path not in identities]
+        modified = [
+            file_path
+            for file_path in self._identities
+            if file_path in identities and identities[file_path] != self._identities[file_path]
+        ]
+        new = sorted(file_path for file_path in identities if file_path not in self._identities)
+
+        for file_path in deleted:
+            del self._summaries[file_path]
+            del self._identities[file_path]
+        rebuild = bool(deleted)
+        for file_path in modified:
+            summary = self._summarize(file_path, identities[file_path])
+            if summary is not None:
+                self._summaries[file_path] = summary
+                self._identities[file_path] = identities[file_path]
+                rebuild = True
+
+        results = self.pipeline.results
+        if rebuild:
+            results = EvaluationResults(
+                num_bins=self.pipeline._num_bins,
+                num_files=0,
+                max_distance=self.pipeline._max_distance,
+                resolution=self.pipeline._resolution,
+            )
+            results.bootstrap = dict(self.pipeline.results.bootstrap)
+            self.pipeline._add_summaries(results, list(self._summaries.values()))
+
+        added = []
+        for file_path in new:
+            summary = self._summarize(file_path, identities[file_path])
+            if summary is None:
+                continue
+            self._summaries[file_path] = summary
+            self._identities[file_path] = identities[file_path]
+            added.append(summary)
+        self.pipeline._add_summaries(results, added)
+
+        results._num_files = len(self._summaries)
+        self.pipeline.results = results
+        return rebuild or bool(added)
+
+    def write(self):
+        """
+        Rewrite all outputs of the results directory. Each output is renamed into place once all
+        of them are written, so readers never see partially written files. The cache is saved at
+        the same time rather than on every poll.
+        """
+        self.pipeline._write_outputs(self.pipeline.results)
+        self.pipeline._update_latest()
+        if self.pipeline._cache is not None:
+            self.pipeline._cache.prune(self._summaries, [self.pipeline.evaluation_dir])
+            self.pipeline._cache.save()
+
+    def run(self, max_polls: int = None):
+        self.pipeline._create_output_folder()
+        # Treat startup as a change so the outputs are written even for an empty directory
+        last_change = time.monotonic() - self.debounce
+        last_write = time.monotonic()
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                polls += 1
+                changed = self.poll()
+                now = time.monotonic()
+                if changed:
+                    last_change = now
+                if last_change is not None and (
+                    (not changed and now - last_change >= self.debounce)
+                    or now - last_write >= self.max_delay
+                ):
+                    self.write()
+                    last_change = None
+                    last_write = now
+                    print(
+                        f"Updated {self.pipeline.results_dir}: {len(self._summaries)} files, "
+                        f"{len(self.results.obstacles)} obstacles"
+                    )
+                time.sleep(self.interval)
+        finally:
+            if last_change is not None:
+                self.write()
+        return self.results
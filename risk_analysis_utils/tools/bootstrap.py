@@ -0,0 +1,41 @@
+import numpy as np
+
+# Upper bound on the recording draws held in memory at once, resamples are processed in chunks
+# small enough to stay below it
+MAX_CHUNK_DRAWS = 1 << 22
+
+
+def bootstrap_rates(
+    counts,
+    hours,
+    num_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    max_chunk_draws: int = MAX_CHUNK_DRAWS,
+):
+    """
+    Percentile bootstrap confidence intervals of the rates counts.sum(axis=0) / hours.sum()
+    when resampling recordings with replacement. counts is a (recordings x rates) matrix and
+    hours the recorded hours of each recording; returns the lower and upper bounds of each rate.
+    Every resample is a vector of how often each recording was drawn, so a chunk of resamples
+    reduces to a single matrix product with the counts.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    hours = np.asarray(hours, dtype=np.float64)
+    num_recordings, num_rates = counts.shape
+    if num_recordings == 0 or num_resamples <= 0:
+        return np.full(num_rates, np.nan), np.full(num_rates, np.nan)
+
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, min(num_resamples, max_chunk_draws // num_recordings))
+    rates = np.empty((num_resamples, num_rates))
+    for start in range(0, num_resamples, chunk_size):
+        n = min(chunk_size, num_resamples - start)
+        draws = rng.integers(0, num_recordings, size=(n, num_recordings))
+        draws += np.arange(n)[:, None] * num_recordings
+        weights = np.bincount(draws.ravel(), minlength=n * num_recordings)
+        weights = weights.reshape(n, num_recordings).astype(np.float64)
+        rates[start : start + n] = (weights @ counts) / (weights @ hours)[:, None]
+    alpha = 1 - confidence
+    lower, upper = np.quantile(rates, [alpha / 2, 1 - alpha / 2], axis=0)
+    return lower, upper
@@ -1,24 +1,375 @@
+import os
 import typer
 from pathlib import Path
+from typing import List, Optional
+from typer.core import TyperGroup
 
-app = typer.Typer(add_completion=False, rich_markup_mode="rich")
 
+class DefaultCommandGroup(TyperGroup):
+    """
+    Run the evaluate command when no sub-command is given, so that
+    `risk_analysis_pipeline <data>` keeps working next to the other sub-commands.
+    """
 
-@app.command(help="Get the analysis of the obstacles from integration testing framework")
+    default_command = "evaluate"
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
+
+
+app = typer.Typer(add_completion=False, rich_markup_mode="rich", cls=DefaultCommandGroup)
+
+
+@app.command(
+    "evaluate", help="Get the analysis of the obstacles from integration testing framework"
+)
 def get_evaluation_results(
-    data: Path = typer.Argument(..., help="Path to all the json files", show_default=False),
+    data: List[Path] = typer.Argument(
+        ...,
+        help="Directories or .tar(.gz)/.zip archives of json files, evaluated together",
+        show_default=False,
+    ),
     max_distance: float = typer.Option(
         4.0, help="Maximum distance for evaluation", rich_help_panel="Additional Options"
     ),
     resolution: float = typer.Option(
         0.5, help="Resolution of each bin", rich_help_panel="Additional Options"
     ),
+    workers: int = typer.Option(
+        1,
+        help="Number of worker processes for JSON ingestion",
+        rich_help_panel="Additional Options",
+    ),
+    read_ahead: int = typer.Option(
+        0,
+        help="Number of files read ahead of the parser on network filesystems, off (0) by default",
+        rich_help_panel="I/O Options",
+    ),
+    read_workers: int = typer.Option(
+        4,
+        help="Number of threads reading files ahead of the parser (per worker process)",
+        rich_help_panel="I/O Options",
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse parsed files from <data>/results/.cache and only parse new or modified files",
+        rich_help_panel="Cache Options",
+    ),
+    cache_hash: bool = typer.Option(
+        False,
+        help="Also validate cache entries with a content hash",
+        rich_help_panel="Cache Options",
+    ),
+    purge_cache: bool = typer.Option(
+        False, help="Delete the cache before running", rich_help_panel="Cache Options"
+    ),
+    rebin: Optional[List[str]] = typer.Option(
+        None,
+        help="Additional binning as RESOLUTION or MAX_DISTANCE:RESOLUTION, can be repeated",
+        rich_help_panel="Additional Options",
+        show_default=False,
+    ),
+    json_backend: str = typer.Option(
+        "auto",
+        help="JSON decoder: auto, json, orjson or stream (constant memory, requires ijson)",
+        rich_help_panel="Additional Options",
+    ),
+    min_frames: int = typer.Option(
+        3,
+        help="Minimum duration in frames (end_frame - start_frame) of an obstacle, shorter "
+        "detections are dropped",
+        rich_help_panel="Additional Options",
+    ),
+    merge_overlaps: bool = typer.Option(
+        False,
+        help="Merge overlapping detections of the same obstacle type in a recording before "
+        "filtering and binning them",
+        rich_help_panel="Additional Options",
+    ),
+    profile: bool = typer.Option(
+        False,
+        help="Also write a cProfile dump of the run to profile.prof in the results folder",
+        rich_help_panel="Additional Options",
+    ),
+    outputs: Optional[List[str]] = typer.Option(
+        None,
+        help="Outputs to write, comma separated or repeated: file_names, results, durations, "
+        "rates and npz. All by default",
+        rich_help_panel="Additional Options",
+        show_default=False,
+    ),
+    bootstrap_resamples: int = typer.Option(
+        1000,
+        help="Bootstrap resamples of the recordings for the confidence intervals of the obstacle "
+        "rates, 0 disables them",
+        rich_help_panel="Statistics Options",
+    ),
+    confidence: float = typer.Option(
+        0.95, help="Confidence level of the intervals", rich_help_panel="Statistics Options"
+    ),
+    seed: int = typer.Option(
+        0, help="Random seed of the bootstrap", rich_help_panel="Statistics Options"
+    ),
+    console: str = typer.Option(
+        "full",
+        help="Console output: full, top (only the --top files with most obstacles), "
+        "summary (no per-file tables) or quiet",
+        rich_help_panel="Console Options",
+    ),
+    top: int = typer.Option(
+        20, help="Number of files shown with --console top", rich_help_panel="Console Options"
+    ),
+    page_size: Optional[int] = typer.Option(
+        None,
+        help="Split the per-file tables into pages of this many rows",
+        rich_help_panel="Console Options",
+        show_default=False,
+    ),
+    quiet: bool = typer.Option(
+        False, "--quiet", "-q", help="Same as --console quiet", rich_help_panel="Console Options"
+    ),
 ):
     from risk_analysis_utils.risk_evaluation_pipeline import RiskEvaluationPipeline
+    from risk_analysis_utils.tools.evaluation_cache import EvaluationCache
+    from risk_analysis_utils.tools.evaluation_results import CONSOLE_MODES
+    from risk_analysis_utils.tools.recording_parser import resolve_backend
+
+    try:
+        resolve_backend(json_backend)
+    except (ValueError, ImportError) as e:
+        raise typer.BadParameter(str(e), param_hint="--json-backend")
+    selected_outputs = None
+    if outputs:
+        selected_outputs = [output for spec in outputs for output in spec.split(",") if output]
+        unknown = [
+            output for output in selected_outputs if output not in RiskEvaluationPipeline.OUTPUTS
+        ]
+        if unknown:
+            raise typer.BadParameter(
+                f"Unknown outputs {unknown}, expected some of {list(RiskEvaluationPipeline.OUTPUTS)}",
+                param_hint="--outputs",
+            )
+
+    if quiet:
+        console = "quiet"
+    if console not in CONSOLE_MODES:
+        raise typer.BadParameter(
+            f"Unknown console mode '{console}', expected one of {CONSOLE_MODES}",
+            param_hint="--console",
+        )
+
+    if not 0 < confidence < 1:
+        raise typer.BadParameter("Must be between 0 and 1", param_hint="--confidence")
+
+    for source in data:
+        if not source.exists():
+            raise typer.BadParameter(f"'{source}' does not exist", param_hint="DATA")
+
+    binnings = []
+    for spec in rebin or []:
+        try:
+            extra_max_distance, _, extra_resolution = spec.rpartition(":")
+            binnings.append((float(extra_max_distance or max_distance), float(extra_resolution)))
+        except ValueError:
+            raise typer.BadParameter(f"Invalid binning '{spec}'", param_hint="--rebin")
+
+    pipeline = RiskEvaluationPipeline(
+        evaluation_dir=list(data),
+        max_distance=max_distance,
+        resolution=resolution,
+        workers=workers,
+        read_ahead=read_ahead,
+        read_workers=read_workers,
+        outputs=selected_outputs,
+        use_cache=cache,
+        cache_hash=cache_hash,
+        json_backend=json_backend,
+        min_frames=min_frames,
+        merge_overlaps=merge_overlaps,
+        bootstrap_resamples=bootstrap_resamples,
+        confidence=confidence,
+        seed=seed,
+    )
+    if purge_cache:
+        EvaluationCache(pipeline.evaluation_dir).purge()
+
+    profiler = None
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    pipeline.run()
+    pipeline.print(mode=console, top=top, page_size=page_size)
+    for extra_max_distance, extra_resolution in binnings:
+        results = pipeline.rebin(extra_max_distance, extra_resolution)
+        if console != "quiet":
+            results.print_bin_distribution()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(str(pipeline.results_dir), "profile.prof"))
+
+
+@app.command(help="Watch a directory and keep the latest results up to date as new files land")
+def watch(
+    data: Path = typer.Argument(..., help="Path to all the json files", show_default=False),
+    max_distance: float = typer.Option(
+        4.0, help="Maximum distance for evaluation", rich_help_panel="Additional Options"
+    ),
+    resolution: float = typer.Option(
+        0.5, help="Resolution of each bin", rich_help_panel="Additional Options"
+    ),
+    interval: float = typer.Option(
+        5.0, help="Seconds between two polls of the directory", rich_help_panel="Watch Options"
+    ),
+    debounce: float = typer.Option(
+        2.0,
+        help="Seconds without new files before the outputs are rewritten",
+        rich_help_panel="Watch Options",
+    ),
+    max_delay: float = typer.Option(
+        60.0,
+        help="Maximum seconds between two rewrites of the outputs while new files keep arriving",
+        rich_help_panel="Watch Options",
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse parsed files from <data>/results/.cache and only parse new or modified files",
+        rich_help_panel="Cache Options",
+    ),
+    json_backend: str = typer.Option(
+        "auto",
+        help="JSON decoder: auto, json, orjson or stream (constant memory, requires ijson)",
+        rich_help_panel="Additional Options",
+    ),
+    min_frames: int = typer.Option(
+        3,
+        help="Minimum duration in frames (end_frame - start_frame) of an obstacle, shorter "
+        "detections are dropped",
+        rich_help_panel="Additional Options",
+    ),
+    merge_overlaps: bool = typer.Option(
+        False,
+        help="Merge overlapping detections of the same obstacle type in a recording before "
+        "filtering and binning them",
+        rich_help_panel="Additional Options",
+    ),
+):
+    from risk_analysis_utils.risk_evaluation_watcher import RiskEvaluationWatcher
+
+    watcher = RiskEvaluationWatcher(
+        evaluation_dir=data,
+        max_distance=max_distance,
+        resolution=resolution,
+        interval=interval,
+        debounce=debounce,
+        max_delay=max_delay,
+        use_cache=cache,
+        json_backend=json_backend,
+        min_frames=min_frames,
+        merge_overlaps=merge_overlaps,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def _run_index(data: Path):
+    from risk_analysis_utils.tools.recording_sources import output_base
+    from risk_analysis_utils.tools.run_index import RunIndex
+
+    index = RunIndex(os.path.join(output_base(data), "results")).load().refresh()
+    index.save()
+    return index
+
+
+@app.command(help="Compare the per-bin obstacle rates of two runs and flag regressions")
+def compare(
+    data: Path = typer.Argument(
+        ..., help="Directory or archive whose results are compared", show_default=False
+    ),
+    baseline: Optional[str] = typer.Option(
+        None, help="Baseline run, defaults to the run before the candidate", show_default=False
+    ),
+    candidate: Optional[str] = typer.Option(
+        None, help="Candidate run, defaults to the latest run", show_default=False
+    ),
+    threshold: float = typer.Option(
+        0.1, help="Relative rate increase above which a bin is flagged as a regression"
+    ),
+    fail_on_regression: bool = typer.Option(
+        False, help="Exit with status 1 when a regression is found"
+    ),
+):
+    from risk_analysis_utils.tools.run_comparison import print_comparison
+
+    index = _run_index(data)
+    runs = index.runs
+    candidate = candidate or (runs[-1] if runs else None)
+    if candidate not in index:
+        raise typer.BadParameter(f"No run '{candidate}' in the results", param_hint="--candidate")
+    if baseline is None:
+        earlier = [run for run in runs if run < candidate]
+        baseline = earlier[-1] if earlier else None
+    if baseline not in index:
+        raise typer.BadParameter(f"No run '{baseline}' in the results", param_hint="--baseline")
+
+    baseline_summary = index.summary(baseline)
+    candidate_summary = index.summary(
+        candidate, baseline_summary["max_distance"], baseline_summary["resolution"]
+    )
+    if print_comparison(baseline_summary, candidate_summary, threshold) and fail_on_regression:
+        raise typer.Exit(code=1)
+
+
+@app.command(help="Show the obstacle counts and rates of the last runs")
+def trend(
+    data: Path = typer.Argument(
+        ..., help="Directory or archive whose results are shown", show_default=False
+    ),
+    last: int = typer.Option(20, min=1, help="Number of most recent runs to show"),
+):
+    from risk_analysis_utils.tools.run_comparison import print_trend
+
+    index = _run_index(data)
+    print_trend([index.summary(run) for run in index.runs[-last:]])
+
+
+@app.command(help="List the obstacles of a recording that are active in a range of frames")
+def active(
+    data: Path = typer.Argument(
+        ..., help="Directory or archive whose results are queried", show_default=False
+    ),
+    recording: str = typer.Argument(..., help="Name of the recording", show_default=False),
+    frames: str = typer.Argument(
+        ..., help="Frames as FIRST-LAST or a single frame", show_default=False
+    ),
+    run: Optional[str] = typer.Option(
+        None, help="Run to query, defaults to the latest run", show_default=False
+    ),
+):
+    from risk_analysis_utils.tools.evaluation_results import EvaluationResults
+    from risk_analysis_utils.tools.recording_sources import output_base
 
-    RiskEvaluationPipeline(
-        evaluation_dir=data, max_distance=max_distance, resolution=resolution
-    ).run().print()
+    try:
+        first, _, last = frames.partition("-")
+        first_frame, last_frame = int(first), int(last or first)
+    except ValueError:
+        raise typer.BadParameter(f"Invalid frame range '{frames}'", param_hint="FRAMES")
+    artifact = os.path.join(output_base(data), "results", run or "latest", "evaluation_results.npz")
+    if not os.path.exists(artifact):
+        raise typer.BadParameter(f"No results artifact {artifact}", param_hint="--run")
+    results = EvaluationResults.load(artifact, mmap=True)
+    if recording not in results.obstacles.names:
+        print(f"[WARNING] No obstacles of recording '{recording}' in {artifact}")
+    results.print_active_obstacles(recording, first_frame, last_frame)
 
 
 def run():
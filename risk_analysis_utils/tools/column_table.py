@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class ColumnTable:
+    """
+    Growable columnar store, one array per entry of COLUMNS filled up to the table size.
+    Names are interned: rows reference them by integer id into `names` in the ID_COLUMN.
+    """
+
+    COLUMNS = {}
+    ID_COLUMN = None
+
+    def __init__(self, capacity: int = 1024):
+        self.names = []
+        self._name_ids = {}
+        self._size = 0
+        self._columns = {
+            column: np.empty(capacity, dtype=dtype) for column, dtype in self.COLUMNS.items()
+        }
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def from_columns(cls, names, columns: dict):
+        """
+        Build a table around existing column arrays without copying them, e.g. memory-mapped
+        columns of a saved results artifact. Appending to it copies the columns first.
+        """
+        table = cls(capacity=0)
+        for name in names:
+            table.intern(name)
+        table._columns = {column: columns[column] for column in cls.COLUMNS}
+        table._size = len(table._columns[cls.ID_COLUMN])
+        return table
+
+    def __getstate__(self):
+        # Only ship the filled part of the columns, e.g. when returned from a worker process
+        state = self.__dict__.copy()
+        state["_columns"] = {column: self.column(column).copy() for column in self.COLUMNS}
+        return state
+
+    def column(self, column: str) -> np.ndarray:
+        return self._columns[column][: self._size]
+
+    def copy(self):
+        return type(self).concatenate([self])
+
+    def intern(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self._name_ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+    def _reserve(self, n: int):
+        required = self._size + n
+        capacity = len(self._columns[self.ID_COLUMN])
+        if required <= capacity and self._columns[self.ID_COLUMN].flags.writeable:
+            return
+        capacity = max(required, 2 * capacity)
+        for column, values in self._columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[: self._size] = values[: self._size]
+            self._columns[column] = grown
+
+    def _append(self, values: dict, n: int):
+        """
+        Append n rows given as a sequence per column.
+        """
+        self._reserve(n)
+        for column, column_values in values.items():
+            self._columns[column][self._size : self._size + n] = column_values
+        self._size += n
+
+    def merge(self, other):
+        """
+        Return a new table holding the rows of self followed by the rows of other.
+        """
+        return type(self).concatenate([self, other])
+
+    @classmethod
+    def concatenate(cls, tables):
+        """
+        Return a new table holding the rows of all tables in order. Every column is concatenated
+        once and the name ids of each table are remapped with a single lookup.
+        """
+        tables = list(tables)
+        merged = cls(capacity=0)
+        remaps = [
+            np.array([merged.intern(name) for name in table.names], dtype=np.int32)
+            for table in tables
+        ]
+        columns = {
+            column: np.concatenate(
+                [table.column(column) for table in tables] + [np.empty(0, dtype)]
+            )
+            for column, dtype in cls.COLUMNS.items()
+        }
+        columns[cls.ID_COLUMN] = np.concatenate(
+            [remap[table.column(cls.ID_COLUMN)] for remap, table in zip(remaps, tables)]
+            + [np.empty(0, cls.COLUMNS[cls.ID_COLUMN])]
+        )
+        merged._columns = columns
+        merged._size = len(columns[cls.ID_COLUMN])
+        return merged
@@ -0,0 +1,278 @@
+import hashlib
+import math
+import os
+import shutil
+import zipfile
+
+import numpy as np
+
+from risk_analysis_utils.tools.npz_io import load_npz, save_npz
+from risk_analysis_utils.tools.recording_sources import RecordingEntry, source_of
+
+# Per-recording columns of a shard, read into lists once so that lookups avoid NumPy scalars
+ROW_COLUMNS = ("size", "mtime_ns", "sha256", "name", "duration", "num_obstacles", "offsets")
+# Per-obstacle fields of a summary and their dtypes in a shard
+OBSTACLE_COLUMNS = {
+    "start_frame": np.int64,
+    "end_frame": np.int64,
+    "distance": np.float64,
+    "obstacle_type": np.int8,
+}
+
+
+def _sha256(entry: RecordingEntry) -> str:
+    # Files are read again from disk when parsed, so their content is not kept after hashing
+    digest = hashlib.sha256(entry.read()).hexdigest()
+    entry.release()
+    return digest
+
+
+class _Shard:
+    """
+    Cached summaries of the recordings of one source, stored column-wise in an .npz file: one
+    row per recording, and the obstacles of all recordings concatenated and delimited by offsets.
+    Entries added or dropped since it was loaded are kept aside until it is saved.
+    """
+
+    def __init__(self, file_path: str, source: str, version: int):
+        self.file_path = file_path
+        self.source = source
+        self.version = version
+        self.columns = None
+        self.rows = {}
+        self._values = {}
+        self.updates = {}
+        self.removed = set()
+        self.dirty = False
+
+    def load(self):
+        try:
+            columns = load_npz(self.file_path, mmap=False)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return self
+        if "version" not in columns or int(columns["version"]) != self.version:
+            return self
+        self._set_columns(columns)
+        return self
+
+    def _set_columns(self, columns):
+        self.columns = columns
+        if columns is None:
+            self.rows, self._values = {}, {}
+            return
+        self.rows = {key: row for row, key in enumerate(columns["key"].tolist())}
+        self._values = {column: columns[column].tolist() for column in ROW_COLUMNS}
+
+    def keys(self) -> list:
+        stored = [key for key in self.rows if key not in self.removed]
+        return stored + [key for key in self.updates if key not in self.rows]
+
+    def get(self, key: str):
+        """
+        Return the (identity, summary) of a recording or None. Obstacle fields are views into
+        the shard columns.
+        """
+        if key in self.updates:
+            return self.updates[key]
+        row = self.rows.get(key)
+        if row is None or key in self.removed:
+            return None
+        values = self._values
+        identity = {"size": values["size"][row], "mtime_ns": values["mtime_ns"][row]}
+        if values["sha256"][row]:
+            identity["sha256"] = values["sha256"][row]
+        lo, hi = values["offsets"][row], values["offsets"][row + 1]
+        duration = values["duration"][row]
+        summary = {
+            "name": values["name"][row],
+            "duration": None if math.isnan(duration) else duration,
+            "num_obstacles": values["num_obstacles"][row],
+            **{column: self.columns[column][lo:hi] for column in OBSTACLE_COLUMNS},
+        }
+        return identity, summary
+
+    def put(self, key: str, identity: dict, summary: dict):
+        self.updates[key] = (identity, summary)
+        self.dirty = True
+
+    def remove(self, key: str):
+        self.updates.pop(key, None)
+        if key in self.rows:
+            self.removed.add(key)
+        self.dirty = True
+
+    def save(self):
+        """
+        Rewrite the shard from the kept rows of its columns followed by the updated entries.
+        """
+        if not self.dirty:
+            return
+        keys, identities, summaries = [], [], []
+        for key, (identity, summary) in self.updates.items():
+            keys.append(key)
+            identities.append(identity)
+            summaries.append(summary)
+        lengths = [len(summary["start_frame"]) for summary in summaries]
+        added = {
+            "key": np.array(keys, dtype=str),
+            "size": np.array([identity["size"] for identity in identities], dtype=np.int64),
+            "mtime_ns": np.array([identity["mtime_ns"] for identity in identities], dtype=np.int64),
+            "sha256": np.array([identity.get("sha256", "") for identity in identities], dtype=str),
+            "name": np.array([summary["name"] for summary in summaries], dtype=str),
+            "duration": np.array(
+                [np.nan if s["duration"] is None else s["duration"] for s in summaries],
+                dtype=np.float64,
+            ),
+            "num_obstacles": np.array([s["num_obstacles"] for s in summaries], dtype=np.int64),
+            "lengths": np.array(lengths, dtype=np.int64),
+        }
+        for column, dtype in OBSTACLE_COLUMNS.items():
+            added[column] = np.concatenate(
+                [np.asarray(s[column], dtype=dtype) for s in summaries] + [np.empty(0, dtype)]
+            )
+
+        if self.columns is not None:
+            old = self.columns
+            keep = np.array(
+                [key not in self.removed and key not in self.updates for key in self.rows],
+                dtype=bool,
+            )
+            old_lengths = np.diff(old["offsets"])
+            keep_obstacles = np.repeat(keep, old_lengths)
+            merged = {}
+            for column in ("key", "size", "mtime_ns", "sha256", "name", "duration"):
+                merged[column] = np.concatenate([old[column][keep], added[column]])
+            merged["num_obstacles"] = np.concatenate(
+                [old["num_obstacles"][keep], added["num_obstacles"]]
+            )
+            merged["lengths"] = np.concatenate([old_lengths[keep], added["lengths"]])
+            for column in OBSTACLE_COLUMNS:
+                merged[column] = np.concatenate([old[column][keep_obstacles], added[column]])
+            added = merged
+
+        lengths = added.pop("lengths")
+        if not len(lengths):
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+            self._set_columns(None)
+        else:
+            added["offsets"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            added["version"] = np.array(self.version)
+            added["source"] = np.array(self.source)
+            save_npz(self.file_path, added)
+            self._set_columns(added)
+        self.updates = {}
+        self.removed = set()
+        self.dirty = False
+
+
+class EvaluationCache:
+    """
+    Persistent cache of parsed per-file obstacle summaries stored in <evaluation_dir>/results/.cache.
+    Entries are keyed by recording (file path or archive member) and validated against its size
+    and mtime, and optionally against a SHA-256 of the content so that touched or re-copied files
+    are not parsed again. Each source (directory or archive) has its own column-wise shard, so
+    summaries stay NumPy arrays in memory and a new file only rewrites the shard of its source.
+    """
+
+    VERSION = 3
+
+    def __init__(self, evaluation_dir, use_hash: bool = False):
+        self.cache_dir = os.path.join(str(evaluation_dir), "results", ".cache")
+        self.use_hash = use_hash
+        self._shards = {}
+        self._sources = {}
+        self._identities = {}
+
+    def __len__(self):
+        return sum(len(shard.keys()) for shard in self._shards.values())
+
+    def shard_file(self, source: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"summaries_{digest}.npz")
+
+    def _shard(self, source: str) -> _Shard:
+        # Shards by source as given, to resolve the path only once per source
+        shard = self._sources.get(source)
+        if shard is None:
+            path = os.path.abspath(source)
+            shard = self._shards.get(path)
+            if shard is None:
+                shard = _Shard(self.shard_file(path), path, self.VERSION).load()
+                self._shards[path] = shard
+            self._sources[source] = shard
+        return shard
+
+    def load(self):
+        """
+        Forget the entries read so far, shards are read again when a recording of their source is
+        looked up.
+        """
+        self._shards = {}
+        self._sources = {}
+        self._identities = {}
+        return self
+
+    def lookup(self, entry: RecordingEntry):
+        """
+        Return the cached summary of a recording, or None if it is missing or stale.
+        """
+        entry.stat()
+        identity = {"size": entry.size, "mtime_ns": entry.mtime_ns}
+        self._identities[entry.key] = identity
+        shard = self._shard(source_of(entry.key))
+        cached = shard.get(entry.key)
+        if cached is None:
+            return None
+        cached_identity, summary = cached
+        if (
+            cached_identity["size"] == identity["size"]
+            and cached_identity["mtime_ns"] == identity["mtime_ns"]
+        ):
+            if not self.use_hash or "sha256" in cached_identity:
+                return summary
+        if self.use_hash:
+            identity["sha256"] = _sha256(entry)
+            if cached_identity.get("sha256") == identity["sha256"]:
+                shard.put(entry.key, dict(identity), summary)
+                return summary
+        return None
+
+    def update(self, entry: RecordingEntry, summary: dict):
+        identity = self._identities.get(entry.key)
+        if identity is None:
+            entry.stat()
+            identity = {"size": entry.size, "mtime_ns": entry.mtime_ns}
+        if self.use_hash and "sha256" not in identity:
+            identity["sha256"] = _sha256(entry)
+        self._shard(source_of(entry.key)).put(entry.key, dict(identity), summary)
+
+    def prune(self, keys, sources):
+        """
+        Drop the entries of recordings that belonged to one of the evaluated sources (directories
+        or archives) but are not part of them anymore.
+        """
+        keep = set(keys)
+        for source in sources:
+            shard = self._shard(source)
+            for key in shard.keys():
+                if key not in keep:
+                    shard.remove(key)
+
+    def save(self):
+        dirty = [shard for shard in self._shards.values() if shard.dirty]
+        if not dirty:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for shard in dirty:
+            shard.save()
+        # Left behind by the JSON cache of earlier versions
+        legacy_file = os.path.join(self.cache_dir, "summaries.json")
+        if os.path.exists(legacy_file):
+            os.remove(legacy_file)
+
+    def purge(self):
+        self._shards = {}
+        self._sources = {}
+        self._identities = {}
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -1,30 +1,385 @@
-from rich import box
-from rich.console import Console
-from rich.table import Table
-
 import numpy as np
 import os
+import sys
 import json
 import csv
+from typing import TYPE_CHECKING
+
+from risk_analysis_utils.tools.obstacle_table import (
+    DROPOFF,
+    HIGHER_AND_DROPOFF,
+    HIGHER_OBSTACLE,
+    OBSTACLE_TYPES,
+    ObstacleTable,
+    digitize_distances,
+)
+from risk_analysis_utils.tools.bootstrap import bootstrap_rates
+from risk_analysis_utils.tools.interval_index import IntervalIndex
+from risk_analysis_utils.tools.npz_io import load_npz, save_npz
+from risk_analysis_utils.tools.recording_table import RecordingTable
+
+if TYPE_CHECKING:
+    from rich import box
+    from rich.console import Console
+    from rich.table import Table
+
+# full prints every table, top only the files with the most obstacles, summary no per-file table
+# and quiet nothing at all
+CONSOLE_MODES = ("full", "top", "summary", "quiet")
+
+
+def _table(table_format: "box.Box" = None, **kwargs) -> "Table":
+    # rich is only imported once something is printed, it is slow to import
+    from rich import box
+    from rich.table import Table
+
+    return Table(box=table_format or box.HORIZONTALS, **kwargs)
 
 
 class EvaluationResults:
-    def __init__(self, num_bins: int, num_files: int, max_distance: float = 4.0):
-        self._count_obstacle_free = 0
-        self._count_both_type = 0
-        self.higher_obstacle_bins = np.zeros(num_bins, dtype=np.int16)
-        self.dropoff_bins = np.zeros(num_bins, dtype=np.int16)
-        self.higher_obstacles_bin_files = {n: [] for n in range(num_bins)}
-        self.dropoff_bins_files = {n: [] for n in range(num_bins)}
-        self.dropoff_higher_obstacle = []
-        self.obstacle_free_file_names = []
+    ARTIFACT_VERSION = 2
+
+    def __init__(
+        self, num_bins: int, num_files: int, max_distance: float = 4.0, resolution: float = None
+    ):
+        self.obstacles = ObstacleTable()
+        self.recordings = RecordingTable()
         self._num_bins = num_bins
         self._max_distance = max_distance
+        self._resolution = resolution if resolution is not None else max_distance / max(num_bins, 1)
         self._num_files = num_files
-        self.durations_of_each_recording = []
+        # Bootstrap of the confidence intervals of the obstacle rates, num_resamples=0 disables it
+        self.bootstrap = {"num_resamples": 1000, "confidence": 0.95, "seed": 0}
+        self._views = {}
+        self._views_key = None
+
+    def print(self, mode: str = "full", top: int = 20, page_size: int = None):
+        self.log_to_console(mode=mode, top=top, page_size=page_size)
+
+    def print_bin_distribution(self):
+        from rich.console import Console
+
+        Console().print(self._rich_combined_obstacle_table())
+
+    @property
+    def higher_obstacle_bins(self) -> np.ndarray:
+        return self.obstacles.counts(HIGHER_OBSTACLE, self._num_bins)
+
+    @property
+    def dropoff_bins(self) -> np.ndarray:
+        return self.obstacles.counts(DROPOFF, self._num_bins)
+
+    @property
+    def _count_obstacle_free(self) -> int:
+        return int(np.count_nonzero(self.recordings.obstacle_free))
+
+    @property
+    def obstacle_free_file_names(self) -> list:
+        return self.recordings.names_of(self.recordings.obstacle_free)
+
+    @property
+    def _count_both_type(self) -> int:
+        return int(np.count_nonzero(self.obstacles.obstacle_type == HIGHER_AND_DROPOFF))
+
+    def _view(self, name: str, compute):
+        """
+        Return a derived view of the results, cached until obstacles or recordings are added.
+        """
+        key = (len(self.obstacles), len(self.obstacles.names), len(self.recordings), self._num_bins)
+        if self._views_key != key:
+            self._views = {}
+            self._views_key = key
+        if name not in self._views:
+            self._views[name] = compute()
+        return self._views[name]
+
+    def prepare_views(self):
+        """
+        Compute the views shared by the writers up front, e.g. before writing in parallel.
+        """
+        self._file_frequency()
+        self._file_durations()
+
+    def obstacle_frequency(self) -> np.ndarray:
+        """
+        Return the (files x bins x obstacle types) count matrix indexed by interned file id.
+        It is built with a single bincount and cached until obstacles are added.
+        """
+        return self._view("frequency", self._obstacle_frequency)
+
+    def _obstacle_frequency(self) -> np.ndarray:
+        obstacles = self.obstacles
+        num_types = len(OBSTACLE_TYPES)
+        flat_index = (
+            obstacles.file_id.astype(np.int64) * self._num_bins + obstacles.bin_index
+        ) * num_types + obstacles.obstacle_type
+        shape = (len(obstacles.names), self._num_bins, num_types)
+        return np.bincount(flat_index, minlength=int(np.prod(shape))).reshape(shape)
+
+    def _file_durations(self, names: list = None):
+        """
+        Return the names and durations in seconds of the files with obstacles and a known,
+        non-zero duration, once per name in the order they were evaluated. names restricts them
+        to the given files.
+        """
+        if names is None:
+            return self._view("file_durations", self._compute_file_durations)
+        return self._compute_file_durations(names)
+
+    def _compute_file_durations(self, names: list = None):
+        recordings = self.recordings
+        mask = (recordings.num_obstacles > 0) & recordings.known_duration()
+        if names is not None:
+            selected = np.zeros(len(recordings.names), dtype=bool)
+            selected[[recordings._name_ids[name] for name in names]] = True
+            mask &= selected[recordings.name_id]
+        name_ids, first = np.unique(recordings.name_id[mask], return_index=True)
+        order = np.argsort(first)
+        durations = recordings.duration[mask][first[order]]
+        return [recordings.names[name_id] for name_id in name_ids[order].tolist()], durations
+
+    def interval_index(self) -> IntervalIndex:
+        return self._view("intervals", lambda: IntervalIndex(self.obstacles))
+
+    def active_obstacles(self, name: str, first_frame: int, last_frame: int) -> np.ndarray:
+        """
+        Return the obstacle rows of a recording that are active in the frames [first_frame,
+        last_frame], see IntervalIndex.
+        """
+        return self.interval_index().active(name, first_frame, last_frame)
+
+    def print_active_obstacles(self, name: str, first_frame: int, last_frame: int):
+        from rich.console import Console
+
+        Console().print(self._rich_active_obstacles(name, first_frame, last_frame))
+
+    def type_counts(self, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Return the (bins x obstacle types) obstacle counts, optionally of a mask of obstacle rows.
+        """
+        num_types = len(OBSTACLE_TYPES)
+        bin_index, obstacle_type = self.obstacles.bin_index, self.obstacles.obstacle_type
+        if rows is not None:
+            bin_index, obstacle_type = bin_index[rows], obstacle_type[rows]
+        flat_index = bin_index.astype(np.int64) * num_types + obstacle_type
+        counts = np.bincount(flat_index, minlength=self._num_bins * num_types)
+        return counts.reshape(self._num_bins, num_types)
+
+    def known_duration_rows(self) -> np.ndarray:
+        """
+        Mask of the obstacle rows that belong to a recording with a known duration.
+        """
+        recordings = self.recordings
+        known_names = np.zeros(len(recordings.names), dtype=bool)
+        known_names[recordings.name_id[recordings.known_duration()]] = True
+        name_ids = np.array(
+            [recordings._name_ids.get(name, -1) for name in self.obstacles.names], dtype=np.int64
+        )
+        file_known = (name_ids >= 0) & known_names[np.maximum(name_ids, 0)]
+        return file_known[self.obstacles.file_id]
+
+    def obstacle_rates(self) -> np.ndarray:
+        """
+        Return the (bins x obstacle types) number of obstacles per hour of recording.
+        Only recordings with a known duration count, both for the obstacles and the exposure;
+        rates are NaN when no duration is known.
+        """
+        hours = self.recordings.exposure_hours()
+        if hours == 0:
+            return np.full((self._num_bins, len(OBSTACLE_TYPES)), np.nan)
+        return self.type_counts(self.known_duration_rows()) / hours
+
+    def recording_counts(self):
+        """
+        Return the (recordings x bins x obstacle types) obstacle counts and the recorded hours of
+        the recordings with a known duration, one row per recording name.
+        """
+        recordings = self.recordings
+        known = recordings.known_duration()
+        name_ids, inverse = np.unique(recordings.name_id[known], return_inverse=True)
+        hours = np.bincount(inverse, weights=recordings.duration[known], minlength=len(name_ids))
+        file_ids = np.array(
+            [self.obstacles._name_ids.get(recordings.names[i], -1) for i in name_ids.tolist()],
+            dtype=np.int64,
+        )
+        counts = np.zeros((len(name_ids), self._num_bins, len(OBSTACLE_TYPES)), dtype=np.int64)
+        has_obstacles = file_ids >= 0
+        counts[has_obstacles] = self.obstacle_frequency()[file_ids[has_obstacles]]
+        return counts, hours / 3600
+
+    def rate_intervals(self):
+        """
+        Return the lower and upper bounds of the bootstrap confidence intervals of the obstacle
+        rates as ((bins + 1) x obstacle types) arrays, the last row being the total over all bins.
+        Recordings are resampled with the settings of self.bootstrap; the bounds are NaN when it
+        is disabled or no duration is known.
+        """
+        settings = tuple(self.bootstrap.values())
+        return self._view(f"rate_intervals{settings}", self._compute_rate_intervals)
+
+    def _compute_rate_intervals(self):
+        counts, hours = self.recording_counts()
+        # Rates of the bins followed by their total, resampled together
+        counts = np.concatenate([counts, counts.sum(axis=1, keepdims=True)], axis=1)
+        shape = (self._num_bins + 1, len(OBSTACLE_TYPES))
+        counts = counts.reshape(len(counts), shape[0] * shape[1])
+        lower, upper = bootstrap_rates(counts, hours, **self.bootstrap)
+        return lower.reshape(shape), upper.reshape(shape)
+
+    def _file_frequency(self, top: int = None):
+        """
+        Return the sorted names of files with higher or dropoff obstacles together with their
+        (files x bins) higher and dropoff count matrices. With top, only the top files with the
+        most obstacles are returned, ordered by their number of obstacles.
+        """
+        names, higher, dropoff = self._view("file_frequency", self._compute_file_frequency)
+        if top is not None:
+            totals = higher.sum(axis=1) + dropoff.sum(axis=1)
+            selected = np.argsort(-totals, kind="stable")[:top]
+            return [names[i] for i in selected.tolist()], higher[selected], dropoff[selected]
+        return names, higher, dropoff
+
+    def _compute_file_frequency(self):
+        frequency = self.obstacle_frequency()
+        higher = frequency[:, :, HIGHER_OBSTACLE]
+        dropoff = frequency[:, :, DROPOFF]
+        file_ids = np.flatnonzero(higher.any(axis=1) | dropoff.any(axis=1))
+        names = [self.obstacles.names[file_id] for file_id in file_ids]
+        order = sorted(range(len(names)), key=names.__getitem__)
+        file_ids = file_ids[order]
+        return [names[i] for i in order], higher[file_ids], dropoff[file_ids]
+
+    def _bin_files(self, obstacle_type: int) -> dict:
+        bin_files = {n: [] for n in range(self._num_bins)}
+        mask = self.obstacles.obstacle_type == obstacle_type
+        names = self.obstacles.names
+        for file_id, start_frame, bin_index in zip(
+            self.obstacles.file_id[mask].tolist(),
+            self.obstacles.start_frame[mask].tolist(),
+            self.obstacles.bin_index[mask].tolist(),
+        ):
+            bin_files[bin_index].append({"name": names[file_id], "startFrame": start_frame})
+        return bin_files
+
+    @property
+    def higher_obstacles_bin_files(self) -> dict:
+        """
+        Per-bin lists of {"name", "startFrame"} dicts for higher obstacles, derived from the obstacle table.
+        """
+        return self._bin_files(HIGHER_OBSTACLE)
+
+    @property
+    def dropoff_bins_files(self) -> dict:
+        """
+        Per-bin lists of {"name", "startFrame"} dicts for dropoffs, derived from the obstacle table.
+        """
+        return self._bin_files(DROPOFF)
+
+    @property
+    def dropoff_higher_obstacle(self) -> list:
+        return [
+            entry
+            for bin_files in self._bin_files(HIGHER_AND_DROPOFF).values()
+            for entry in bin_files
+        ]
+
+    def merge(self, other: "EvaluationResults") -> "EvaluationResults":
+        """
+        Return a new EvaluationResults combining self followed by other.
+        Obstacle rows and file lists are concatenated in order, so merging partial results of
+        consecutive file chunks is associative and reproduces a serial run.
+        """
+        return EvaluationResults.concatenate([self, other])
+
+    @classmethod
+    def concatenate(cls, results: list) -> "EvaluationResults":
+        """
+        Combine a list of results in order, like merging them pairwise but copying every row
+        only once, e.g. to join the partial results of all chunks of a parallel run.
+        """
+        first = results[0]
+        for other in results[1:]:
+            if first._num_bins != other._num_bins or first._max_distance != other._max_distance:
+                raise ValueError(
+                    "Cannot merge EvaluationResults with different bins: "
+                    f"({first._num_bins}, {first._max_distance}) vs ({other._num_bins}, {other._max_distance})"
+                )
+        merged = cls(
+            num_bins=first._num_bins,
+            num_files=sum(other._num_files for other in results),
+            max_distance=first._max_distance,
+            resolution=first._resolution,
+        )
+        merged.bootstrap = dict(first.bootstrap)
+        merged.obstacles = ObstacleTable.concatenate([other.obstacles for other in results])
+        merged.recordings = RecordingTable.concatenate([other.recordings for other in results])
+        return merged
+
+    def rebin(self, max_distance: float, resolution: float) -> "EvaluationResults":
+        """
+        Return a copy of these results binned with a different max_distance and resolution.
+        Bins are recomputed from the stored obstacle distances, so no file has to be parsed again.
+        """
+        num_bins = int(max_distance / resolution)
+        rebinned = EvaluationResults(
+            num_bins=num_bins,
+            num_files=self._num_files,
+            max_distance=max_distance,
+            resolution=resolution,
+        )
+        rebinned.bootstrap = dict(self.bootstrap)
+        rebinned.recordings = self.recordings.copy()
+        rebinned.obstacles = self.obstacles.copy()
+        rebinned.obstacles.bin_index[:] = digitize_distances(
+            self.obstacles.distance, resolution, num_bins
+        )
+        return rebinned
+
+    def save(self, file_path: str):
+        """
+        Save the results as a self-describing binary .npz artifact that load() can memory-map.
+        """
+        metadata = {
+            "version": self.ARTIFACT_VERSION,
+            "num_bins": self._num_bins,
+            "max_distance": self._max_distance,
+            "resolution": self._resolution,
+            "num_files": self._num_files,
+            "columns": list(ObstacleTable.COLUMNS),
+            "recording_columns": list(RecordingTable.COLUMNS),
+        }
+        arrays = {
+            "metadata": np.array(json.dumps(metadata)),
+            "names": np.array(self.obstacles.names, dtype=str),
+            "recording_names": np.array(self.recordings.names, dtype=str),
+        }
+        for column in ObstacleTable.COLUMNS:
+            arrays[column] = self.obstacles.column(column)
+        for column in RecordingTable.COLUMNS:
+            arrays[f"recording_{column}"] = self.recordings.column(column)
+        save_npz(file_path, arrays)
 
-    def print(self):
-        self.log_to_console()
+    @classmethod
+    def load(cls, file_path: str, mmap: bool = True) -> "EvaluationResults":
+        """
+        Load results saved with save(). With mmap=True the obstacle columns are memory-mapped.
+        """
+        arrays = load_npz(file_path, mmap=mmap)
+        metadata = json.loads(str(arrays["metadata"][()]))
+        if metadata.get("version") != cls.ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported results artifact version in {file_path}")
+        results = cls(
+            num_bins=metadata["num_bins"],
+            num_files=metadata["num_files"],
+            max_distance=metadata["max_distance"],
+            resolution=metadata["resolution"],
+        )
+        results.obstacles = ObstacleTable.from_columns(arrays["names"].tolist(), arrays)
+        results.recordings = RecordingTable.from_columns(
+            arrays["recording_names"].tolist(),
+            {column: arrays[f"recording_{column}"] for column in RecordingTable.COLUMNS},
+        )
+        return results
 
     def _get_bin_ranges(self):
         bin_width = self._max_distance / self._num_bins
@@ -32,11 +387,11 @@ class EvaluationResults:
             (round(i * bin_width, 2), round((i + 1) * bin_width, 2)) for i in range(self._num_bins)
         ]
 
-    def _rich_combined_obstacle_table(self, table_format: box.Box = box.HORIZONTALS) -> Table:
+    def _rich_combined_obstacle_table(self, table_format: "box.Box" = None) -> "Table":
         bin_ranges = self._get_bin_ranges()
-        table = Table(
+        table = _table(
             title="[bold blue]Obstacle Distribution by Distance Bin[/bold blue]",
-            box=table_format,
+            table_format=table_format,
             expand=True,
         )
         table.add_column(
@@ -48,22 +403,24 @@ class EvaluationResults:
         table.add_column(
             "Dropoff Count", justify="center", header_style="bold yellow", style="yellow"
         )
+        higher_counts = self.higher_obstacle_bins
+        dropoff_counts = self.dropoff_bins
         for i, (start, end) in enumerate(bin_ranges):
             table.add_row(
                 f"{start:.2f} - {end:.2f}",
-                str(self.higher_obstacle_bins[i]),
-                str(self.dropoff_bins[i]),
+                str(higher_counts[i]),
+                str(dropoff_counts[i]),
             )
         return table
 
-    def _rich_all_obstacle_analysis(self, table_format: box.Box = box.HORIZONTALS) -> Table:
+    def _rich_all_obstacle_analysis(self, table_format: "box.Box" = None) -> "Table":
         total_higher = int(np.sum(self.higher_obstacle_bins))
         total_dropoff = int(np.sum(self.dropoff_bins))
         total_both = self._count_both_type
         total_obstacles = total_higher + total_dropoff + total_both
-        table = Table(
+        table = _table(
             title="[bold red]Overall Obstacle Statistics[/bold red]",
-            box=table_format,
+            table_format=table_format,
             expand=True,
             title_style="bold red",
         )
@@ -75,17 +432,109 @@ class EvaluationResults:
         table.add_row("Both (Higher & Dropoff)", str(total_both), style="magenta")
         return table
 
-    def log_to_console(self, num_files: int = 0) -> None:
-        if self._num_bins == 0:
+    def _rich_obstacle_rates(self, table_format: "box.Box" = None) -> "Table":
+        rates = self.obstacle_rates()
+        rates = np.vstack([rates, rates.sum(axis=0)])
+        caption = f"Normalized by {self.recordings.exposure_hours():.2f} recorded hours"
+        cells = [[f"{r:.2f}" for r in row] for row in rates.tolist()]
+        if self.bootstrap["num_resamples"] > 0:
+            lower, upper = self.rate_intervals()
+            caption += (
+                f", {self.bootstrap['confidence']:.0%} bootstrap intervals over "
+                f"{self.bootstrap['num_resamples']} resamples of the recordings"
+            )
+            # Undefined intervals are left out, "[nan, nan]" would also be taken for rich markup
+            cells = [
+                [
+                    f"{cell} [{lo:.2f}, {hi:.2f}]" if np.isfinite(lo) else cell
+                    for cell, lo, hi in zip(*row)
+                ]
+                for row in zip(cells, lower.tolist(), upper.tolist())
+            ]
+        table = _table(
+            title="[bold blue]Obstacles per Hour by Distance Bin[/bold blue]",
+            caption=caption,
+            table_format=table_format,
+            expand=True,
+        )
+        table.add_column(
+            "Bin Range (m)", justify="center", header_style="bold magenta", style="cyan"
+        )
+        table.add_column("Higher / h", justify="center", header_style="bold green", style="green")
+        table.add_column(
+            "Dropoff / h", justify="center", header_style="bold yellow", style="yellow"
+        )
+        table.add_column("Both / h", justify="center", header_style="bold magenta", style="magenta")
+        for (start, end), row in zip(self._get_bin_ranges(), cells):
+            table.add_row(f"{start:.2f} - {end:.2f}", *row)
+        table.add_row()
+        table.add_row("Total", *cells[-1], style="bold")
+        return table
+
+    def _rich_active_obstacles(
+        self, name: str, first_frame: int, last_frame: int, table_format: "box.Box" = None
+    ) -> "Table":
+        rows = self.active_obstacles(name, first_frame, last_frame)
+        type_names = {obstacle_type: name for name, obstacle_type in OBSTACLE_TYPES.items()}
+        table = _table(
+            title=f"[bold blue]Obstacles of {name} active in Frames {first_frame} - {last_frame}"
+            "[/bold blue]",
+            caption=f"{len(rows)} obstacle(s)",
+            table_format=table_format,
+            expand=True,
+        )
+        table.add_column("Start Frame", justify="center", header_style="bold magenta")
+        table.add_column("End Frame", justify="center", header_style="bold magenta")
+        table.add_column("Distance (m)", justify="center", header_style="bold green", style="green")
+        table.add_column("Type", justify="center", header_style="bold magenta", style="cyan")
+        obstacles = self.obstacles
+        for start, end, distance, obstacle_type in zip(
+            obstacles.start_frame[rows].tolist(),
+            obstacles.end_frame[rows].tolist(),
+            obstacles.distance[rows].tolist(),
+            obstacles.obstacle_type[rows].tolist(),
+        ):
+            table.add_row(str(start), str(end), f"{distance:.2f}", type_names[obstacle_type])
+        return table
+
+    def log_to_console(
+        self, num_files: int = 0, mode: str = "full", top: int = 20, page_size: int = None
+    ) -> None:
+        """
+        Print the analysis to the console. Tables are only built for the sections shown by the
+        mode, see CONSOLE_MODES; with page_size the per-file tables are split into pages.
+        """
+        if mode not in CONSOLE_MODES:
+            raise ValueError(f"Unknown console mode '{mode}', expected one of {CONSOLE_MODES}")
+        if self._num_bins == 0 or mode == "quiet":
             return
+        from rich.console import Console
+
         console = Console()
         console.print(self._rich_combined_obstacle_table())
         console.print()
-        console.print(self._rich_filenames_and_obstacle_frequency())
-        console.print()
-        console.print(self._rich_duration_of_each_file())
-        console.print()
+        if mode != "summary":
+            frequency = self._file_frequency(top=top if mode == "top" else None)
+            self._print_pages(
+                console,
+                len(frequency[0]),
+                page_size,
+                lambda rows: self._rich_filenames_and_obstacle_frequency(
+                    frequency=frequency, rows=rows
+                ),
+            )
+            console.print()
+            durations = self._file_durations(names=frequency[0] if mode == "top" else None)
+            self._print_pages(
+                console,
+                len(durations[0]),
+                page_size,
+                lambda rows: self._rich_duration_of_each_file(durations=durations, rows=rows),
+            )
+            console.print()
         console.print(self._rich_all_obstacle_analysis())
+        console.print()
+        console.print(self._rich_obstacle_rates())
 
         n_free = len(self.obstacle_free_file_names)
         if self._num_files:
@@ -95,6 +544,22 @@ class EvaluationResults:
         console.print("\n[bold underline]Obstacle-Free Files[/bold underline]\n")
         console.print(msg)
 
+    @staticmethod
+    def _print_pages(console: "Console", num_rows: int, page_size: int, build_table):
+        """
+        Print a table built by build_table(rows) for each page of page_size rows, or a single
+        table if page_size is not set. On a terminal the next page is shown on Enter.
+        """
+        if not page_size or num_rows <= page_size:
+            console.print(build_table(None))
+            return
+        interactive = console.is_terminal and sys.stdin.isatty()
+        for start in range(0, num_rows, page_size):
+            if start and interactive:
+                if console.input("[dim]Enter for the next page, q to skip: [/dim]") == "q":
+                    return
+            console.print(build_table(slice(start, start + page_size)))
+
     def log_to_file(self, file_path: str) -> None:
         """
         Write the obstacle analysis results to a text file at the given file path.
@@ -105,14 +570,16 @@ class EvaluationResults:
             f.write("Obstacle Distribution by Distance Bin\n")
             f.write("=" * 40 + "\n")
             f.write(f"{'Bin Range (m)':<20}{'Higher Obstacle':<20}{'Dropoff':<20}\n")
+            higher_counts = self.higher_obstacle_bins
+            dropoff_counts = self.dropoff_bins
             for i, (start, end) in enumerate(bin_ranges):
                 f.write(
-                    f"{start:.2f} - {end:.2f}    {self.higher_obstacle_bins[i]:<20}{self.dropoff_bins[i]:<20}\n"
+                    f"{start:.2f} - {end:.2f}    {higher_counts[i]:<20}{dropoff_counts[i]:<20}\n"
                 )
             f.write("\nOverall Obstacle Statistics\n")
             f.write("=" * 40 + "\n")
-            total_higher = int(np.sum(self.higher_obstacle_bins))
-            total_dropoff = int(np.sum(self.dropoff_bins))
+            total_higher = int(np.sum(higher_counts))
+            total_dropoff = int(np.sum(dropoff_counts))
             total_both = self._count_both_type
             total_obstacles = total_higher + total_dropoff + total_both
             f.write(f"Total Obstacles: {total_obstacles}\n")
@@ -134,55 +601,48 @@ class EvaluationResults:
         csv_path = os.path.splitext(file_path)[0] + "_obstacle_frequency.csv"
         self.save_obstacle_frequency_csv(csv_path)
 
-    def _rich_duration_of_each_file(self, table_format: box.Box = box.HORIZONTALS) -> Table:
+    def _rich_duration_of_each_file(
+        self, table_format: "box.Box" = None, durations=None, rows: slice = None
+    ) -> "Table":
         """
-        Return a rich Table displaying the duration of each file in minutes.
-        The durations are stored in durations_of_each_recording as dicts with 'name' and 'duration' (in seconds).
+        Return a rich Table displaying the duration of each file with obstacles in minutes.
+        durations are the precomputed names and durations of _file_durations and rows the
+        slice of them to show.
         """
 
-        table = Table(
+        table = _table(
             title="[bold blue]Duration of Each File (in Minutes)[/bold blue]",
-            box=table_format,
+            table_format=table_format,
             expand=True,
         )
         table.add_column("File Name", justify="center", header_style="bold magenta", style="cyan")
         table.add_column(
             "Duration (minutes)", justify="center", header_style="bold green", style="green"
         )
-        filenames = set()
-        for entry in self.durations_of_each_recording:
-            name = entry.get("name", "N/A")
-            duration_sec = entry.get("duration", 0)
-
-            if duration_sec == 0 or name == "N/A":
-                continue
-            if name in filenames:
-                continue
-            filenames.add(name)
+        names, durations = durations if durations is not None else self._file_durations()
+        rows = rows or slice(None)
+        for name, duration_sec in zip(names[rows], durations[rows].tolist()):
             duration_min = round(duration_sec / 60, 2)
             table.add_row(str(name), f"{duration_min}")
         return table
 
     def _rich_filenames_and_obstacle_frequency(
-        self, table_format: box.Box = box.HORIZONTALS
-    ) -> Table:
+        self, table_format: "box.Box" = None, frequency=None, rows: slice = None
+    ) -> "Table":
         """
         Return a rich Table where each row is a file name and each column is a bin range (e.g., 0.0-0.5, 0.5-1.0, ...).
         Each cell displays 'higher_obstacle_frequency | dropoff_frequency' for that file and bin.
-        The last column and last row show totals.
+        The last column shows totals, and the last row the totals over all files once the last
+        page of rows is shown. frequency is the precomputed output of _file_frequency.
         """
         bin_ranges = self._get_bin_ranges()
-        file_names = set()
-        for bin_files in self.higher_obstacles_bin_files.values():
-            for f in bin_files:
-                file_names.add(f["name"])
-        for bin_files in self.dropoff_bins_files.values():
-            file_names.add(f["name"])
-
-        file_names = sorted(file_names)
-        table = Table(
+        file_names, higher, dropoff = frequency if frequency is not None else self._file_frequency()
+        last_page = rows is None or rows.stop >= len(file_names)
+        rows = rows or slice(None)
+        file_names, higher, dropoff = file_names[rows], higher[rows], dropoff[rows]
+        table = _table(
             title="[bold blue]File-wise Obstacle Frequency by Bin[/bold blue]",
-            box=table_format,
+            table_format=table_format,
             expand=True,
         )
         table.add_column("File Name", justify="center", header_style="bold magenta", style="cyan")
@@ -190,52 +650,25 @@ class EvaluationResults:
             table.add_column(f"{start:.2f}-{end:.2f}", justify="center", style="white")
         table.add_column("Total", justify="center", header_style="bold yellow", style="yellow")
 
-        # For each file, count how many times it appears in each bin for higher and dropoff
-        file_totals = []
-        for file_name in file_names:
+        file_totals = (higher.sum(axis=1) + dropoff.sum(axis=1)).tolist()
+        for file_name, file_higher, file_dropoff, file_total in zip(
+            file_names, higher.tolist(), dropoff.tolist(), file_totals
+        ):
             row = [file_name]
-            has_obstacle = False
-            file_higher_total = 0
-            file_dropoff_total = 0
-            for bin_idx in range(self._num_bins):
-                higher_count = sum(
-                    1
-                    for f in self.higher_obstacles_bin_files[bin_idx]
-                    if f.get("name") == file_name
-                )
-                dropoff_count = sum(
-                    1 for f in self.dropoff_bins_files[bin_idx] if f.get("name") == file_name
-                )
-                if higher_count > 0 or dropoff_count > 0:
-                    has_obstacle = True
-                row.append(f"{higher_count} | {dropoff_count}")
-                file_higher_total += higher_count
-                file_dropoff_total += dropoff_count
-            file_total = file_higher_total + file_dropoff_total
+            row.extend(f"{h} | {d}" for h, d in zip(file_higher, file_dropoff))
             row.append(f"{file_total}")
-            file_totals.append(file_total)
-            if has_obstacle:
-                table.add_row(*row)
-
-        # Add a total row at the end
-        total_higher_per_bin = []
-        total_dropoff_per_bin = []
-        for bin_idx in range(self._num_bins):
-            total_higher = sum(
-                1 for f in self.higher_obstacles_bin_files[bin_idx] if f.get("name") in file_names
-            )
-            total_dropoff = sum(
-                1 for f in self.dropoff_bins_files[bin_idx] if f.get("name") in file_names
-            )
-            total_higher_per_bin.append(total_higher)
-            total_dropoff_per_bin.append(total_dropoff)
+            table.add_row(*row)
+        if not last_page:
+            return table
 
+        # Add a total row at the end, over all files also when only some of them are shown
+        all_frequency = self.obstacle_frequency()
+        all_higher = all_frequency[:, :, HIGHER_OBSTACLE].sum(axis=0).tolist()
+        all_dropoff = all_frequency[:, :, DROPOFF].sum(axis=0).tolist()
         total_row = ["[bold]Total[/bold]"]
-        grand_total = 0
-        for h, d in zip(total_higher_per_bin, total_dropoff_per_bin):
+        for h, d in zip(all_higher, all_dropoff):
             total_row.append(f"[bold]{h} | {d}[/bold]")
-            grand_total += h + d
-        total_row.append(f"[bold]{grand_total}[/bold]")
+        total_row.append(f"[bold]{sum(all_higher) + sum(all_dropoff)}[/bold]")
 
         table.add_row()
         table.add_row(*total_row, style="bold")
@@ -243,41 +676,18 @@ class EvaluationResults:
 
     def save_obstacle_frequency_json(self, file_path: str):
         bin_ranges = self._get_bin_ranges()
-        file_names = set()
-        for bin_files in self.higher_obstacles_bin_files.values():
-            for fdict in bin_files:
-                file_names.add(fdict["name"])
-        for bin_files in self.dropoff_bins_files.values():
-            for fdict in bin_files:
-                file_names.add(fdict["name"])
-        file_names = sorted(file_names)
+        ranges = [f"{start:.2f}-{end:.2f}" for (start, end) in bin_ranges]
+        file_names, higher, dropoff = self._file_frequency()
+        file_totals = (higher.sum(axis=1) + dropoff.sum(axis=1)).tolist()
 
         data = {}
-        for file_name in file_names:
-            bins = []
-            file_higher_total = 0
-            file_dropoff_total = 0
-            for bin_idx, (start, end) in enumerate(bin_ranges):
-                higher_count = sum(
-                    1
-                    for fdict in self.higher_obstacles_bin_files[bin_idx]
-                    if fdict.get("name") == file_name
-                )
-                dropoff_count = sum(
-                    1
-                    for fdict in self.dropoff_bins_files[bin_idx]
-                    if fdict.get("name") == file_name
-                )
-                bins.append(
-                    {
-                        "range": f"{start:.2f}-{end:.2f}",
-                        "higher": higher_count,
-                        "dropoff": dropoff_count,
-                    }
-                )
-                file_higher_total += higher_count
-                file_dropoff_total += dropoff_count
-            file_total = file_higher_total + file_dropoff_total
+        for file_name, file_higher, file_dropoff, file_total in zip(
+            file_names, higher.tolist(), dropoff.tolist(), file_totals
+        ):
+            bins = [
+                {"range": bin_range, "higher": h, "dropoff": d}
+                for bin_range, h, d in zip(ranges, file_higher, file_dropoff)
+            ]
             data[file_name] = {"bins": bins, "total": file_total}
 
         with open(file_path, "w") as f:
@@ -285,14 +695,7 @@ class EvaluationResults:
 
     def save_obstacle_frequency_csv(self, file_path: str):
         bin_ranges = self._get_bin_ranges()
-        file_names = set()
-        for bin_files in self.higher_obstacles_bin_files.values():
-            for fdict in bin_files:
-                file_names.add(fdict["name"])
-        for bin_files in self.dropoff_bins_files.values():
-            for fdict in bin_files:
-                file_names.add(fdict["name"])
-        file_names = sorted(file_names)
+        file_names, higher, dropoff = self._file_frequency()
 
         # Prepare header: File Name, each bin, Total Higher, Total Dropoff, Grand Total
         header = (
@@ -301,48 +704,60 @@ class EvaluationResults:
             + ["Total Higher", "Total Dropoff", "Grand Total"]
         )
 
+        higher_totals = higher.sum(axis=1).tolist()
+        dropoff_totals = dropoff.sum(axis=1).tolist()
         with open(file_path, "w", newline="") as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(header)
 
-            for file_name in file_names:
+            for file_name, file_higher, file_dropoff, higher_total, dropoff_total in zip(
+                file_names, higher.tolist(), dropoff.tolist(), higher_totals, dropoff_totals
+            ):
                 row = [file_name]
-                file_higher_total = 0
-                file_dropoff_total = 0
-                for bin_idx, (start, end) in enumerate(bin_ranges):
-                    higher_count = sum(
-                        1
-                        for fdict in self.higher_obstacles_bin_files[bin_idx]
-                        if fdict.get("name") == file_name
-                    )
-                    dropoff_count = sum(
-                        1
-                        for fdict in self.dropoff_bins_files[bin_idx]
-                        if fdict.get("name") == file_name
-                    )
-                    row.append(f"{higher_count}|{dropoff_count}")
-                    file_higher_total += higher_count
-                    file_dropoff_total += dropoff_count
-                grand_total = file_higher_total + file_dropoff_total
-                row.extend([str(file_higher_total), str(file_dropoff_total), str(grand_total)])
+                row.extend(f"{h}|{d}" for h, d in zip(file_higher, file_dropoff))
+                grand_total = higher_total + dropoff_total
+                row.extend([str(higher_total), str(dropoff_total), str(grand_total)])
                 writer.writerow(row)
 
     def save_durations_csv(self, file_path: str):
         """
-        Save the durations_of_each_recording to a CSV file with columns 'name' and 'duration_minutes' (rounded to 2 decimals, duration in minutes).
-        Skip entries with duration 0 or name 'N/A', and avoid duplicate names.
+        Save the duration of each file with obstacles to a CSV file with columns 'name' and 'duration_minutes' (rounded to 2 decimals, duration in minutes).
+        Files without a known duration are skipped and each name is written once.
         """
-        filenames = set()
+        names, durations = self._file_durations()
         with open(file_path, "w", newline="") as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=["name", "duration_minutes"])
             writer.writeheader()
-            for entry in self.durations_of_each_recording:
-                name = entry.get("name", "N/A")
-                duration_sec = entry.get("duration", 0)
-                if duration_sec == 0 or name == "N/A":
-                    continue
-                if name in filenames:
-                    continue
-                filenames.add(name)
+            for name, duration_sec in zip(names, durations.tolist()):
                 duration_min = round(duration_sec / 60, 2)
                 writer.writerow({"name": name, "duration_minutes": duration_min})
+
+    def save_obstacle_rates_csv(self, file_path: str):
+        """
+        Save the obstacles per hour of recording of each bin and obstacle type, with the total
+        recorded hours they are normalized by. Unless the bootstrap is disabled, each rate is
+        followed by the bounds of its confidence interval.
+        """
+        rates = self.obstacle_rates()
+        rates = np.vstack([rates, rates.sum(axis=0)])
+        header = [f"{name}_per_hour" for name in OBSTACLE_TYPES]
+        rows = [[f"{r:.4f}" for r in row] for row in rates.tolist()]
+        num_resamples = self.bootstrap["num_resamples"]
+        if num_resamples > 0:
+            lower, upper = self.rate_intervals()
+            header = [f"{column}{suffix}" for column in header for suffix in ("", "_low", "_high")]
+            rows = [
+                [f"{value:.4f}" for triple in zip(*row) for value in triple]
+                for row in zip(rates.tolist(), lower.tolist(), upper.tolist())
+            ]
+        labels = [f"{start:.2f}-{end:.2f}" for start, end in self._get_bin_ranges()] + ["Total"]
+        with open(file_path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["Bin Range (m)"] + header)
+            for label, row in zip(labels, rows):
+                writer.writerow([label] + row)
+            writer.writerow(["Recorded Hours", f"{self.recordings.exposure_hours():.4f}"])
+            if num_resamples > 0:
+                writer.writerow(["Confidence", f"{self.bootstrap['confidence']:.4f}"])
+                writer.writerow(["Bootstrap Resamples", str(num_resamples)])
+                writer.writerow(["Bootstrap Seed", str(self.bootstrap["seed"])])
@@ -0,0 +1,93 @@
+import numpy as np
+
+from risk_analysis_utils.tools.obstacle_table import ObstacleTable
+
+
+def _segmented_cummax(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """
+    Running maximum of values restarting at every group, for values sorted by group.
+    Each group is shifted above the previous ones so that a single accumulate does not leak.
+    """
+    if not len(values):
+        return values.copy()
+    low = values.min()
+    span = values.max() - low + 1
+    offsets = groups.astype(np.int64) * span
+    return np.maximum.accumulate(values - low + offsets) - offsets + low
+
+
+def merge_overlapping(start_frames, end_frames, distances, obstacle_types, groups=None):
+    """
+    Merge the detections whose frame intervals overlap and that have the same obstacle type,
+    i.e. an obstacle detected again while it was still tracked. groups, e.g. the file ids of a
+    batch of recordings, restricts merging to detections of the same group; without it all
+    detections belong to one recording. A merged obstacle spans the union of the intervals and
+    keeps the closest distance. Returns the merged columns followed by their groups, in the order
+    of their first detection.
+    """
+    start_frames = np.asarray(start_frames, dtype=np.int64)
+    end_frames = np.asarray(end_frames, dtype=np.int64)
+    distances = np.asarray(distances, dtype=np.float64)
+    obstacle_types = np.asarray(obstacle_types, dtype=np.int8)
+    if groups is None:
+        groups = np.zeros(len(start_frames), dtype=np.int64)
+    groups = np.asarray(groups, dtype=np.int64)
+    if len(start_frames) < 2:
+        return start_frames, end_frames, distances, obstacle_types, groups
+
+    order = np.lexsort((start_frames, obstacle_types, groups))
+    starts = start_frames[order]
+    ends = end_frames[order]
+    types = obstacle_types[order]
+    # Detections of the same group and type form a segment of the sorted rows
+    segments = groups[order] * (int(types.max()) + 1) + types
+    max_ends = _segmented_cummax(ends, segments)
+    # A detection starts a new obstacle unless it overlaps an earlier one of its segment
+    heads = np.ones(len(order), dtype=bool)
+    heads[1:] = (segments[1:] != segments[:-1]) | (starts[1:] > max_ends[:-1])
+    heads = np.flatnonzero(heads)
+
+    first_seen = np.minimum.reduceat(order, heads)
+    resort = np.argsort(first_seen, kind="stable")
+    return (
+        starts[heads][resort],
+        np.maximum.reduceat(ends, heads)[resort],
+        np.minimum.reduceat(distances[order], heads)[resort],
+        types[heads][resort],
+        groups[first_seen][resort],
+    )
+
+
+class IntervalIndex:
+    """
+    Index of the obstacle frame intervals of an ObstacleTable, per recording. Rows are sorted by
+    recording and start frame next to a running maximum of their end frames, so the obstacles
+    active in a range of frames are found with binary searches instead of a scan of the rows.
+    """
+
+    def __init__(self, obstacles: ObstacleTable):
+        self.obstacles = obstacles
+        self.order = np.lexsort((obstacles.start_frame, obstacles.file_id))
+        self._file_id = obstacles.file_id[self.order]
+        self._start = obstacles.start_frame[self.order]
+        self._end = obstacles.end_frame[self.order]
+        self._max_end = _segmented_cummax(self._end, self._file_id)
+
+    def __len__(self):
+        return len(self.order)
+
+    def active(self, name: str, first_frame: int, last_frame: int) -> np.ndarray:
+        """
+        Return the rows of the obstacle table of recording name that are active in at least one
+        frame of [first_frame, last_frame], ordered by start frame.
+        """
+        file_id = self.obstacles._name_ids.get(name)
+        if file_id is None:
+            return np.empty(0, dtype=np.int64)
+        lo, hi = np.searchsorted(self._file_id, [file_id, file_id + 1])
+        # Rows starting after the range cannot overlap it, nor can the rows before the first
+        # one whose running maximum end frame reaches it
+        hi = lo + np.searchsorted(self._start[lo:hi], last_frame, side="right")
+        lo = lo + np.searchsorted(self._max_end[lo:hi], first_frame, side="left")
+        candidates = np.arange(lo, hi)
+        return self.order[candidates[self._end[lo:hi] >= first_frame]]
@@ -0,0 +1,58 @@
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+
+def save_npz(file_path, arrays: dict):
+    """
+    Write arrays to an uncompressed .npz file, replacing file_path atomically.
+    Uncompressed members can be memory-mapped by load_npz.
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, file_path)
+
+
+def load_npz(file_path, mmap: bool = True) -> dict:
+    """
+    Load all arrays of an .npz file. With mmap=True the members are memory-mapped read-only
+    straight from the archive instead of being copied into memory.
+    """
+    if not mmap:
+        with np.load(file_path, allow_pickle=False) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    arrays = {}
+    with zipfile.ZipFile(file_path) as archive, open(file_path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Cannot memory-map compressed member '{name}' of {file_path}")
+            # The zip local file header is 30 bytes followed by the file name and extra field
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            array_start = info.header_offset + 30 + name_length + extra_length
+            f.seek(array_start)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"Member '{name}' of {file_path} holds Python objects")
+            if not shape or 0 in shape:
+                f.seek(array_start)
+                arrays[name] = np.lib.format.read_array(f, allow_pickle=False)
+                continue
+            arrays[name] = np.memmap(
+                file_path,
+                dtype=dtype,
+                mode="r",
+                offset=f.tell(),
+                shape=shape,
+                order="F" if fortran_order else "C",
+            )
+    return arrays
@@ -0,0 +1,82 @@
+import numpy as np
+
+from risk_analysis_utils.tools.column_table import ColumnTable
+
+HIGHER_OBSTACLE = 0
+DROPOFF = 1
+HIGHER_AND_DROPOFF = 2
+OBSTACLE_TYPES = {
+    "higher": HIGHER_OBSTACLE,
+    "dropoff": DROPOFF,
+    "both": HIGHER_AND_DROPOFF,
+}
+
+
+def digitize_distances(distances, resolution: float, num_bins: int) -> np.ndarray:
+    """
+    Map distances to bins of the given resolution. Distances beyond the last bin fall into it.
+    """
+    edges = resolution * np.arange(1, num_bins)
+    return np.digitize(distances, edges).astype(np.int32)
+
+
+class ObstacleTable(ColumnTable):
+    """
+    Growable columnar store with one row per binned obstacle.
+    File names are interned: rows reference them by integer file id into `names`.
+    """
+
+    COLUMNS = {
+        "file_id": np.int32,
+        "start_frame": np.int64,
+        "end_frame": np.int64,
+        "distance": np.float64,
+        "bin_index": np.int32,
+        "obstacle_type": np.int8,
+    }
+    ID_COLUMN = "file_id"
+
+    @property
+    def file_id(self) -> np.ndarray:
+        return self.column("file_id")
+
+    @property
+    def start_frame(self) -> np.ndarray:
+        return self.column("start_frame")
+
+    @property
+    def end_frame(self) -> np.ndarray:
+        return self.column("end_frame")
+
+    @property
+    def distance(self) -> np.ndarray:
+        return self.column("distance")
+
+    @property
+    def bin_index(self) -> np.ndarray:
+        return self.column("bin_index")
+
+    @property
+    def obstacle_type(self) -> np.ndarray:
+        return self.column("obstacle_type")
+
+    def extend(self, file_ids, start_frames, end_frames, distances, bin_indices, obstacle_types):
+        """
+        Append rows given as equally long sequences, one per column.
+        """
+        values = dict(
+            file_id=file_ids,
+            start_frame=start_frames,
+            end_frame=end_frames,
+            distance=distances,
+            bin_index=bin_indices,
+            obstacle_type=obstacle_types,
+        )
+        self._append(values, len(file_ids))
+
+    def counts(self, obstacle_type: int, num_bins: int) -> np.ndarray:
+        """
+        Number of obstacles of the given type in each distance bin.
+        """
+        mask = self.obstacle_type == obstacle_type
+        return np.bincount(self.bin_index[mask], minlength=num_bins)
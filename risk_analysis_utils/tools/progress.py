@@ -0,0 +1,35 @@
+import sys
+
+
+class _NoProgress:
+    """
+    Stand-in for a tqdm bar when no progress is shown, so that tqdm is not even imported.
+    """
+
+    def __init__(self, iterable=None, **kwargs):
+        self.iterable = iterable
+        self.n = 0
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n: int = 1):
+        self.n += n
+
+
+def progress(iterable=None, **kwargs):
+    """
+    Return a tqdm progress bar when stderr is a terminal and a silent stand-in otherwise,
+    e.g. in CI logs.
+    """
+    if not sys.stderr.isatty():
+        return _NoProgress(iterable, **kwargs)
+    import tqdm
+
+    return tqdm.tqdm(iterable, **kwargs)
@@ -0,0 +1,183 @@
+import functools
+import importlib.util
+import json
+import os
+
+import numpy as np
+
+from risk_analysis_utils.tools.obstacle_table import DROPOFF, HIGHER_AND_DROPOFF, HIGHER_OBSTACLE
+
+# Files above this size are streamed with the "auto" backend when ijson is installed
+DEFAULT_STREAM_THRESHOLD = 64 * 2**20
+OBSTACLE_FIELDS = ("distance", "start_frame", "end_frame", "is_higher_obstacle", "is_dropoff")
+
+
+def _orjson_loads(raw: bytes):
+    import orjson
+
+    return orjson.loads(raw)
+
+
+# Decoders turn the raw bytes of a file into Python objects, more can be added with register_decoder
+_DECODERS = {
+    "json": json.loads,
+    "orjson": _orjson_loads,
+}
+_DECODER_MODULES = {"orjson": "orjson"}
+BACKENDS = ("auto", "stream", *_DECODERS)
+
+
+def register_decoder(name: str, loads, module: str = None):
+    """
+    Register a decoder taking the raw bytes of a file. module is the import name required by
+    the decoder, it is only selected when that module is installed.
+    """
+    global BACKENDS
+    _DECODERS[name] = loads
+    if module is not None:
+        _DECODER_MODULES[name] = module
+    BACKENDS = ("auto", "stream", *_DECODERS)
+
+
+@functools.lru_cache(maxsize=None)
+def _is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def available_backends() -> list:
+    backends = [
+        name
+        for name in _DECODERS
+        if name not in _DECODER_MODULES or _is_installed(_DECODER_MODULES[name])
+    ]
+    if _is_installed("ijson"):
+        backends.append("stream")
+    return backends
+
+
+def resolve_backend(backend: str = "auto", size: int = None, stream_threshold: int = None) -> str:
+    """
+    Pick the backend used for a file. "auto" streams files above stream_threshold when ijson is
+    installed and otherwise prefers the fastest installed decoder over the stdlib.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}', expected one of {BACKENDS}")
+    available = available_backends()
+    if backend == "auto":
+        if (
+            size is not None
+            and stream_threshold is not None
+            and size > stream_threshold
+            and "stream" in available
+        ):
+            return "stream"
+        return "orjson" if "orjson" in available else "json"
+    if backend not in available:
+        module = "ijson" if backend == "stream" else _DECODER_MODULES[backend]
+        raise ImportError(f"JSON backend '{backend}' requires '{module}' to be installed")
+    return backend
+
+
+def _new_summary(name, duration) -> dict:
+    return {
+        "name": name,
+        "duration": duration,
+        "num_obstacles": 0,
+        "start_frame": [],
+        "end_frame": [],
+        "distance": [],
+        "obstacle_type": [],
+    }
+
+
+def _add_obstacle(summary: dict, obstacle: dict):
+    summary["num_obstacles"] += 1
+    if obstacle["is_higher_obstacle"] and not obstacle["is_dropoff"]:
+        obstacle_type = HIGHER_OBSTACLE
+    elif obstacle["is_dropoff"] and not obstacle["is_higher_obstacle"]:
+        obstacle_type = DROPOFF
+    elif obstacle["is_dropoff"] and obstacle["is_higher_obstacle"]:
+        obstacle_type = HIGHER_AND_DROPOFF
+    else:
+        print(f"[WARNING] Obstacle Detected but does not belong to any category, problem in code")
+        return
+    summary["start_frame"].append(obstacle["start_frame"])
+    summary["end_frame"].append(obstacle["end_frame"])
+    summary["distance"].append(obstacle["distance"])
+    summary["obstacle_type"].append(obstacle_type)
+
+
+def _finish_summary(summary: dict) -> dict:
+    # Obstacle fields are kept as arrays, a summary may stay in memory for the whole run
+    summary["start_frame"] = np.array(summary["start_frame"], dtype=np.int64)
+    summary["end_frame"] = np.array(summary["end_frame"], dtype=np.int64)
+    summary["distance"] = np.array(summary["distance"], dtype=np.float64)
+    summary["obstacle_type"] = np.array(summary["obstacle_type"], dtype=np.int8)
+    return summary
+
+
+def summarize_recording(data: dict) -> dict:
+    """
+    Reduce a decoded recording to a summary holding only what the evaluation needs. The summary
+    does not depend on the binning, so it can be cached across runs with different parameters.
+    """
+    summary = _new_summary(data["name"], data.get("scene_duration"))
+    for obstacle in data["obstacles"]:
+        _add_obstacle(summary, obstacle)
+    return _finish_summary(summary)
+
+
+def _stream_summary(f) -> dict:
+    """
+    Build the summary from parser events without materializing the document, so memory stays
+    constant however many obstacles a recording holds.
+    """
+    import ijson
+
+    fields = {}
+    summary = _new_summary(None, None)
+    obstacle = None
+    try:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix == "obstacles.item":
+                if event == "start_map":
+                    obstacle = {}
+                elif event == "end_map":
+                    _add_obstacle(summary, obstacle)
+                    obstacle = None
+            elif obstacle is not None:
+                field = prefix[len("obstacles.item.") :]
+                if field in OBSTACLE_FIELDS:
+                    obstacle[field] = value
+            elif prefix in ("name", "scene_duration") and event != "map_key":
+                fields[prefix] = value
+            elif prefix == "obstacles" and event == "start_array":
+                fields["obstacles"] = True
+    except ijson.JSONError as e:
+        # Malformed JSON raises ValueError with every backend
+        raise ValueError(f"Invalid JSON: {e}") from e
+    if "obstacles" not in fields:
+        raise KeyError("obstacles")
+    summary["name"] = fields["name"]
+    summary["duration"] = fields.get("scene_duration")
+    return _finish_summary(summary)
+
+
+def parse_recording_stream(
+    f, backend: str = "auto", size: int = None, stream_threshold: int = DEFAULT_STREAM_THRESHOLD
+) -> dict:
+    """
+    Parse a recording from a binary file object into its summary.
+    """
+    backend = resolve_backend(backend, size, stream_threshold)
+    if backend == "stream":
+        return _stream_summary(f)
+    return summarize_recording(_DECODERS[backend](f.read()))
+
+
+def parse_recording(
+    file_path, backend: str = "auto", stream_threshold: int = DEFAULT_STREAM_THRESHOLD
+) -> dict:
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        return parse_recording_stream(f, backend, size, stream_threshold)
@@ -0,0 +1,209 @@
+import collections
+import datetime
+import io
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ZIP_SUFFIXES = (".zip",)
+ARCHIVE_SEPARATOR = "::"
+
+
+def is_archive(path) -> bool:
+    return str(path).lower().endswith(TAR_SUFFIXES + ZIP_SUFFIXES)
+
+
+def output_base(source) -> str:
+    """
+    Return the directory holding the results of a source: the directory itself, or the
+    directory containing an archive.
+    """
+    source = str(source)
+    return os.path.dirname(os.path.abspath(source)) if is_archive(source) else source
+
+
+def _is_recording_member(name: str) -> bool:
+    # Skip the "._" resource forks macOS adds next to every file it archives
+    return name.endswith(".json") and not os.path.basename(name).startswith("._")
+
+
+class RecordingEntry:
+    """
+    A JSON recording, either a file in a directory or a member of an archive.
+    The key identifies the recording across runs, e.g. for the parse cache.
+    """
+
+    def __init__(self, key: str, path: str = None, size: int = None, mtime_ns: int = None):
+        self.key = key
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._opener = None
+        self._data = None
+
+    @classmethod
+    def from_file(cls, path) -> "RecordingEntry":
+        path = os.path.abspath(path)
+        return cls(key=path, path=path)
+
+    @classmethod
+    def from_member(cls, archive, member: str, size: int, mtime_ns: int, opener):
+        entry = cls(
+            key=f"{os.path.abspath(archive)}{ARCHIVE_SEPARATOR}{member}",
+            size=size,
+            mtime_ns=mtime_ns,
+        )
+        entry._opener = opener
+        return entry
+
+    def __getstate__(self):
+        if self.path is None:
+            raise TypeError("Archive members can only be read while their archive is iterated")
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def stat(self) -> "RecordingEntry":
+        if self.size is None or self.mtime_ns is None:
+            stat = os.stat(self.path)
+            self.size, self.mtime_ns = stat.st_size, stat.st_mtime_ns
+        return self
+
+    def open(self):
+        """
+        Open the recording as a binary file object.
+        """
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        if self.path is not None:
+            return open(self.path, "rb")
+        return self._opener()
+
+    def read(self) -> bytes:
+        # Archive members can be read only once from the stream, so the content is kept
+        if self._data is None:
+            with self.open() as f:
+                self._data = f.read()
+        return self._data
+
+    def release(self):
+        """
+        Drop the content kept by read(), files are read again from disk when needed.
+        """
+        if self.path is not None:
+            self._data = None
+
+
+def source_of(key: str) -> str:
+    """
+    Return the directory or archive a recording key belongs to.
+    """
+    if ARCHIVE_SEPARATOR in key:
+        return key.split(ARCHIVE_SEPARATOR, 1)[0]
+    return os.path.dirname(key)
+
+
+def list_directory(directory, stat: bool = False) -> list:
+    """
+    List the recordings of a directory in a single scandir pass. With stat, their size and mtime
+    are read at the same time.
+    """
+    entries = []
+    with os.scandir(directory) as it:
+        for dir_entry in it:
+            if not dir_entry.name.endswith(".json"):
+                continue
+            entry = RecordingEntry.from_file(dir_entry.path)
+            if stat:
+                file_stat = dir_entry.stat()
+                entry.size, entry.mtime_ns = file_stat.st_size, file_stat.st_mtime_ns
+            entries.append(entry)
+    return entries
+
+
+def _read_ahead(entry: RecordingEntry, max_bytes: int = None):
+    if max_bytes is None or entry.stat().size <= max_bytes:
+        entry.read()
+
+
+def prefetch(items, read_ahead: int = 0, read_workers: int = 4, max_bytes: int = None):
+    """
+    Yield (RecordingEntry, summary) items in order while a pool of read_workers threads reads
+    the content of the entries still to be parsed (summary is None) up to read_ahead items ahead,
+    so that file latency overlaps with parsing. Files above max_bytes are left to the parser.
+    """
+    if read_ahead <= 0 or read_workers <= 0:
+        yield from items
+        return
+
+    window = collections.deque()
+    with ThreadPoolExecutor(max_workers=read_workers) as executor:
+        for entry, summary in items:
+            future = executor.submit(_read_ahead, entry, max_bytes) if summary is None else None
+            window.append((entry, summary, future))
+            if len(window) > read_ahead:
+                yield _next_prefetched(window)
+        while window:
+            yield _next_prefetched(window)
+
+
+def _next_prefetched(window: collections.deque):
+    entry, summary, future = window.popleft()
+    if future is not None:
+        future.result()
+    return entry, summary
+
+
+class ArchiveReader:
+    """
+    Iterate over the JSON members of a .tar(.gz/.bz2/.xz) or .zip archive without extracting it.
+    Tar archives are read as a stream, so every member has to be used before the next one is
+    requested. position is the number of archive bytes consumed so far, for progress reporting.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.size = os.path.getsize(self.path)
+        self.position = 0
+
+    def __iter__(self):
+        if self.path.lower().endswith(ZIP_SUFFIXES):
+            yield from self._iter_zip()
+        else:
+            yield from self._iter_tar()
+
+    def _iter_tar(self):
+        with open(self.path, "rb") as raw, tarfile.open(fileobj=raw, mode="r|*") as archive:
+            for member in archive:
+                self.position = raw.tell()
+                if not member.isfile() or not _is_recording_member(member.name):
+                    continue
+                yield RecordingEntry.from_member(
+                    self.path,
+                    member.name,
+                    size=member.size,
+                    mtime_ns=int(member.mtime * 1e9),
+                    opener=lambda member=member: archive.extractfile(member),
+                )
+            self.position = self.size
+
+    def _iter_zip(self):
+        with zipfile.ZipFile(self.path) as archive:
+            for info in archive.infolist():
+                self.position = info.header_offset
+                if info.is_dir() or not _is_recording_member(info.filename):
+                    continue
+                yield RecordingEntry.from_member(
+                    self.path,
+                    info.filename,
+                    size=info.file_size,
+                    mtime_ns=_zip_mtime_ns(info),
+                    opener=lambda info=info: archive.open(info),
+                )
+            self.position = self.size
+
+
+def _zip_mtime_ns(info: zipfile.ZipInfo) -> int:
+    return int(datetime.datetime(*info.date_time).timestamp() * 1e9)
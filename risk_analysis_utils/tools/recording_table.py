@@ -0,0 +1,64 @@
+import numpy as np
+
+from risk_analysis_utils.tools.column_table import ColumnTable
+
+
+class RecordingTable(ColumnTable):
+    """
+    Growable columnar store with one row per evaluated recording, filled once per file.
+    Names are interned like in the ObstacleTable; a missing duration is stored as NaN.
+    """
+
+    COLUMNS = {
+        "name_id": np.int32,
+        "duration": np.float64,
+        "num_obstacles": np.int64,
+        "obstacle_free": np.bool_,
+    }
+    ID_COLUMN = "name_id"
+
+    def __init__(self, capacity: int = 256):
+        super().__init__(capacity)
+
+    @property
+    def name_id(self) -> np.ndarray:
+        return self.column("name_id")
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self.column("duration")
+
+    @property
+    def num_obstacles(self) -> np.ndarray:
+        return self.column("num_obstacles")
+
+    @property
+    def obstacle_free(self) -> np.ndarray:
+        return self.column("obstacle_free")
+
+    def extend(self, name_ids, durations, num_obstacles):
+        """
+        Append rows given as equally long sequences. Recordings without obstacles are flagged
+        as obstacle-free.
+        """
+        num_obstacles = np.asarray(num_obstacles, dtype=np.int64)
+        values = dict(
+            name_id=name_ids,
+            duration=durations,
+            num_obstacles=num_obstacles,
+            obstacle_free=num_obstacles == 0,
+        )
+        self._append(values, len(num_obstacles))
+
+    def names_of(self, mask) -> list:
+        return [self.names[name_id] for name_id in self.name_id[mask].tolist()]
+
+    def known_duration(self) -> np.ndarray:
+        """
+        Mask of the recordings with a known, non-zero duration.
+        """
+        duration = self.duration
+        return ~np.isnan(duration) & (duration != 0)
+
+    def exposure_hours(self) -> float:
+        return float(self.duration[self.known_duration()].sum()) / 3600
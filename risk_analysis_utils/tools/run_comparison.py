@@ -0,0 +1,127 @@
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+import numpy as np
+
+from risk_analysis_utils.tools.obstacle_table import OBSTACLE_TYPES
+
+
+def _normalized(summary: dict, per_hour: bool) -> np.ndarray:
+    if per_hour:
+        return summary["known_counts"] / summary["hours"]
+    return summary["counts"] / max(summary["num_files"], 1)
+
+
+def compare_runs(baseline: dict, candidate: dict, threshold: float = 0.1) -> dict:
+    """
+    Compare two run summaries of a RunIndex with the same binning. Counts are normalized per
+    hour of recording when both runs know their durations and per file otherwise. Rows are the
+    distance bins followed by the total; a cell regresses when its rate grew by more than
+    threshold relative to the baseline.
+    """
+    per_hour = baseline["hours"] > 0 and candidate["hours"] > 0
+    base = _normalized(baseline, per_hour)
+    cand = _normalized(candidate, per_hour)
+    base = np.vstack([base, base.sum(axis=0)])
+    cand = np.vstack([cand, cand.sum(axis=0)])
+    delta = cand - base
+    return {
+        "unit": "per hour" if per_hour else "per file",
+        "baseline": base,
+        "candidate": cand,
+        "delta": delta,
+        "regression": (delta > 0) & (cand > base * (1 + threshold)),
+    }
+
+
+def _bin_labels(summary: dict) -> list:
+    bin_width = summary["max_distance"] / summary["num_bins"]
+    return [
+        f"{round(i * bin_width, 2):.2f} - {round((i + 1) * bin_width, 2):.2f}"
+        for i in range(summary["num_bins"])
+    ]
+
+
+def rich_comparison_table(
+    baseline: dict, candidate: dict, comparison: dict, table_format: box.Box = box.HORIZONTALS
+) -> Table:
+    table = Table(
+        title=f"[bold blue]Obstacles {comparison['unit']}: {baseline['name']} -> "
+        f"{candidate['name']}[/bold blue]",
+        box=table_format,
+        expand=True,
+    )
+    table.add_column("Bin Range (m)", justify="center", header_style="bold magenta", style="cyan")
+    for name in OBSTACLE_TYPES:
+        table.add_column(name.capitalize(), justify="center", header_style="bold magenta")
+    labels = _bin_labels(baseline) + ["Total"]
+    for i, label in enumerate(labels):
+        row = [label]
+        for j in range(len(OBSTACLE_TYPES)):
+            cell = (
+                f"{comparison['baseline'][i, j]:.2f} -> {comparison['candidate'][i, j]:.2f} "
+                f"({comparison['delta'][i, j]:+.2f})"
+            )
+            row.append(f"[bold red]{cell}[/bold red]" if comparison["regression"][i, j] else cell)
+        if label == "Total":
+            table.add_row()
+        table.add_row(*row, style="bold" if label == "Total" else None)
+    return table
+
+
+def rich_trend_table(summaries: list, table_format: box.Box = box.HORIZONTALS) -> Table:
+    table = Table(
+        title="[bold blue]Obstacle Trend across Runs[/bold blue]", box=table_format, expand=True
+    )
+    table.add_column(
+        "Run", justify="center", header_style="bold magenta", style="cyan", no_wrap=True
+    )
+    table.add_column("Files", justify="center", header_style="bold magenta")
+    table.add_column("Hours", justify="center", header_style="bold magenta")
+    for name in OBSTACLE_TYPES:
+        table.add_column(name.capitalize(), justify="center", header_style="bold magenta")
+    table.add_column("Total", justify="center", header_style="bold yellow", style="yellow")
+    table.add_column("Obstacles / h", justify="center", header_style="bold green")
+    previous_rate = None
+    for summary in summaries:
+        totals = summary["counts"].sum(axis=0).tolist()
+        rate = summary["known_counts"].sum() / summary["hours"] if summary["hours"] else None
+        if rate is None:
+            rate_cell = "-"
+        elif previous_rate is None or rate == previous_rate:
+            rate_cell = f"{rate:.2f}"
+        else:
+            color = "red" if rate > previous_rate else "green"
+            rate_cell = f"[{color}]{rate:.2f} ({rate - previous_rate:+.2f})[/{color}]"
+        previous_rate = rate if rate is not None else previous_rate
+        table.add_row(
+            summary["name"],
+            str(summary["num_files"]),
+            f"{summary['hours']:.2f}",
+            *(str(total) for total in totals),
+            str(sum(totals)),
+            rate_cell,
+        )
+    return table
+
+
+def print_comparison(baseline: dict, candidate: dict, threshold: float = 0.1) -> int:
+    """
+    Print the comparison of two runs and return the number of regressed cells.
+    """
+    comparison = compare_runs(baseline, candidate, threshold)
+    console = Console()
+    console.print(rich_comparison_table(baseline, candidate, comparison))
+    num_regressions = int(np.count_nonzero(comparison["regression"]))
+    if num_regressions:
+        console.print(
+            f"[bold red]{num_regressions} rate(s) regressed by more than {threshold:.0%}.[/bold red]"
+        )
+    else:
+        console.print("[bold green]No regressions.[/bold green]")
+    return num_regressions
+
+
+def print_trend(summaries: list):
+    Console().print(rich_trend_table(summaries))
@@ -0,0 +1,128 @@
+import json
+import os
+
+import numpy as np
+
+from risk_analysis_utils.tools.evaluation_results import EvaluationResults
+
+ARTIFACT_FILENAME = "evaluation_results.npz"
+
+
+class RunIndex:
+    """
+    Index of the timestamped runs in a results folder, stored in <results>/.cache/runs.json.
+    Each run is summarized once from its evaluation_results.npz artifact (bin parameters, number
+    of files, recorded hours and per-bin counts of each obstacle type) and only summarized again
+    when the artifact changes, so comparing many runs reads neither text outputs nor raw JSON.
+    """
+
+    VERSION = 1
+    FILENAME = "runs.json"
+
+    def __init__(self, results_root):
+        self.results_root = str(results_root)
+        self.index_file = os.path.join(self.results_root, ".cache", self.FILENAME)
+        self._runs = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __contains__(self, run: str):
+        return run in self._runs and not self._runs[run].get("unsupported")
+
+    @property
+    def runs(self) -> list:
+        """
+        Names of the indexed runs, oldest first.
+        """
+        return sorted(run for run in self._runs if run in self)
+
+    def load(self):
+        try:
+            with open(self.index_file, "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if cached.get("version") == self.VERSION:
+            self._runs = cached.get("runs", {})
+        return self
+
+    def refresh(self):
+        """
+        Summarize new or rewritten runs and drop the ones that were deleted.
+        Hidden folders such as .cache and the latest symlink are skipped.
+        """
+        seen = set()
+        if os.path.isdir(self.results_root):
+            with os.scandir(self.results_root) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or entry.is_symlink() or not entry.is_dir():
+                        continue
+                    artifact = os.path.join(entry.path, ARTIFACT_FILENAME)
+                    try:
+                        stat = os.stat(artifact)
+                    except FileNotFoundError:
+                        continue
+                    cached = self._runs.get(entry.name)
+                    seen.add(entry.name)
+                    if (
+                        cached is not None
+                        and cached["size"] == stat.st_size
+                        and cached["mtime_ns"] == stat.st_mtime_ns
+                    ):
+                        continue
+                    try:
+                        summary = self._summarize(EvaluationResults.load(artifact, mmap=True))
+                    except ValueError as e:
+                        # Remembered as unsupported, so that it is only reported once
+                        print(f"[WARNING] Skipping run {entry.name}: {e}")
+                        summary = {"unsupported": True}
+                    summary.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                    self._runs[entry.name] = summary
+                    self._dirty = True
+        for run in [run for run in self._runs if run not in seen]:
+            del self._runs[run]
+            self._dirty = True
+        return self
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"version": self.VERSION, "runs": self._runs}, f)
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def summary(self, run: str, max_distance: float = None, resolution: float = None) -> dict:
+        """
+        Return the summary of a run with its counts as (bins x obstacle types) arrays. When a
+        binning is given and differs from the one of the run, the counts are rebinned from the
+        obstacle distances of its artifact.
+        """
+        if run not in self:
+            raise KeyError(f"Unknown run '{run}' in {self.results_root}")
+        summary = dict(self._runs[run], name=run)
+        if (max_distance, resolution) != (None, None) and (
+            summary["max_distance"] != max_distance or summary["resolution"] != resolution
+        ):
+            artifact = os.path.join(self.results_root, run, ARTIFACT_FILENAME)
+            results = EvaluationResults.load(artifact, mmap=True).rebin(max_distance, resolution)
+            summary.update(self._summarize(results))
+        summary["counts"] = np.asarray(summary["counts"], dtype=np.int64)
+        summary["known_counts"] = np.asarray(summary["known_counts"], dtype=np.int64)
+        return summary
+
+    @staticmethod
+    def _summarize(results: EvaluationResults) -> dict:
+        return {
+            "num_bins": results._num_bins,
+            "max_distance": results._max_distance,
+            "resolution": results._resolution,
+            "num_files": results._num_files,
+            "hours": results.recordings.exposure_hours(),
+            "counts": results.type_counts().tolist(),
+            "known_counts": results.type_counts(results.known_duration_rows()).tolist(),
+        }
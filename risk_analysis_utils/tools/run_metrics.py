@@ -0,0 +1,108 @@
+import contextlib
+import heapq
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def peak_rss_mb(children: bool = False):
+    """
+    Peak resident set size of this process, or with children of the largest of its terminated
+    child processes, e.g. the workers of a parallel evaluation.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    max_rss = max_rss.ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+def children_cpu_s() -> float:
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class RunMetrics:
+    """
+    Timing and resource usage of the stages of a pipeline run, written as metrics.json.
+    """
+
+    def __init__(self, slowest_n: int = 10):
+        self.slowest_n = slowest_n
+        self.stages = {}
+        self.counters = {
+            "files": 0,
+            "files_parsed": 0,
+            "files_cached": 0,
+            "bytes_read": 0,
+            "parse_s": 0.0,
+            "obstacles": 0,
+        }
+        self._slowest = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, threaded: bool = False):
+        """
+        Measure a stage. A threaded stage runs on a thread next to other stages, so its CPU time
+        is the one of its thread rather than of the whole process. The CPU time of the child
+        processes that finished during the stage is reported separately.
+        """
+        cpu_time = time.thread_time if threaded else time.process_time
+        wall_start = time.perf_counter()
+        cpu_start = cpu_time()
+        children_start = children_cpu_s()
+        try:
+            yield
+        finally:
+            self.stages[name] = {
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": cpu_time() - cpu_start,
+                "children_cpu_s": children_cpu_s() - children_start,
+                "peak_rss_mb": peak_rss_mb(),
+                "peak_rss_children_mb": peak_rss_mb(children=True),
+            }
+
+    def record_file(self, file_path, num_bytes: int, seconds: float):
+        """
+        Account for a parsed file and keep track of the slowest ones.
+        """
+        self.counters["files_parsed"] += 1
+        self.counters["bytes_read"] += num_bytes
+        self.counters["parse_s"] += seconds
+        item = (seconds, str(file_path), num_bytes)
+        if len(self._slowest) < self.slowest_n:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage)
+        evaluation = stages.get("run_evaluation")
+        if evaluation is not None and evaluation["wall_s"] > 0:
+            evaluation["files_per_s"] = self.counters["files"] / evaluation["wall_s"]
+            evaluation["bytes_per_s"] = self.counters["bytes_read"] / evaluation["wall_s"]
+        return {
+            "stages": stages,
+            "counters": dict(self.counters),
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_children_mb": peak_rss_mb(children=True),
+            "slowest_files": [
+                {"file": file_path, "bytes": num_bytes, "parse_s": seconds}
+                for seconds, file_path, num_bytes in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def save(self, file_path: str):
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, file_path)
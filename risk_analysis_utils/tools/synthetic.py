@@ -0,0 +1,74 @@
+import json
+import os
+
+import numpy as np
+
+DISTANCE_DISTRIBUTIONS = ("uniform", "exponential")
+
+
+def generate_recordings(
+    output_dir,
+    num_files: int,
+    obstacles_per_file: int = 5,
+    max_distance: float = 4.0,
+    distance_distribution: str = "uniform",
+    higher_fraction: float = 0.6,
+    dropoff_fraction: float = 0.35,
+    obstacle_free_fraction: float = 0.2,
+    seed: int = 0,
+):
+    """
+    Write num_files JSON files shaped like the integration testing framework output.
+    The number of obstacles per file is Poisson distributed around obstacles_per_file, the
+    remaining share after higher_fraction and dropoff_fraction are obstacles of both types.
+    Returns the number of obstacles written.
+    """
+    if distance_distribution not in DISTANCE_DISTRIBUTIONS:
+        raise ValueError(
+            f"Unknown distance distribution '{distance_distribution}', "
+            f"expected one of {DISTANCE_DISTRIBUTIONS}"
+        )
+    if higher_fraction + dropoff_fraction > 1.0:
+        raise ValueError("higher_fraction and dropoff_fraction must add up to at most 1")
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    type_probabilities = [
+        higher_fraction,
+        dropoff_fraction,
+        1.0 - higher_fraction - dropoff_fraction,
+    ]
+    total_obstacles = 0
+    for i in range(num_files):
+        name = f"recording_{i:06d}"
+        num_obstacles = 0
+        if rng.random() >= obstacle_free_fraction:
+            num_obstacles = max(1, int(rng.poisson(obstacles_per_file)))
+        if distance_distribution == "uniform":
+            distances = rng.uniform(0.0, 1.25 * max_distance, num_obstacles)
+        else:
+            distances = rng.exponential(max_distance / 3, num_obstacles)
+        start_frames = rng.integers(0, 3000, num_obstacles)
+        lengths = rng.integers(0, 60, num_obstacles)
+        types = rng.choice(3, size=num_obstacles, p=type_probabilities)
+        obstacles = [
+            {
+                "distance": round(float(distance), 3),
+                "start_frame": int(start_frame),
+                "end_frame": int(start_frame + length),
+                "is_higher_obstacle": bool(obstacle_type != 1),
+                "is_dropoff": bool(obstacle_type != 0),
+            }
+            for distance, start_frame, length, obstacle_type in zip(
+                distances, start_frames, lengths, types
+            )
+        ]
+        recording = {
+            "name": name,
+            "scene_duration": round(float(rng.uniform(30.0, 900.0)), 2),
+            "obstacles": obstacles,
+        }
+        with open(os.path.join(output_dir, f"{name}.json"), "w") as f:
+            json.dump(recording, f)
+        total_obstacles += num_obstacles
+    return total_obstacles